@@ -3,16 +3,3176 @@ import re
 import os
 import shutil
 import json
+import tempfile
+import codecs
+import queue
+import threading
+import mmap
+import pickle
+import time
+import hashlib
+import zlib
+import uuid
+import importlib
+import argparse
+import contextlib
+import csv
+import fnmatch
+import sqlite3
+import difflib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+from array import array
+from itertools import compress, islice
+from bisect import bisect_left, bisect_right
+
+STARTUP_STARTED = time.perf_counter()
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
     QTextEdit, QPushButton, QFileDialog, QLabel, QLineEdit, QCheckBox, 
-    QRadioButton, QButtonGroup, QMessageBox, QTabWidget, QComboBox, QToolBar, QDialog, QTabBar
+    QRadioButton, QButtonGroup, QMessageBox, QTabWidget, QComboBox, QToolBar, QDialog, QTabBar,
+    QInputDialog, QProgressBar, QAbstractScrollArea, QStackedWidget, QDockWidget, QTreeWidget,
+    QTreeWidgetItem, QSpinBox, QPlainTextEdit
+)
+from PySide6.QtCore import (
+    Qt, QTimer, QDateTime, QObject, QEvent, QPoint, QProcess, QRunnable, QThreadPool, Signal, QElapsedTimer,
+    QSize, QStandardPaths
+)
+from PySide6.QtGui import (
+    QFont, QTextCursor, QTextDocument, QIcon, QAction, QTextCharFormat, QPainter, QFontMetrics, QKeySequence,
+    QColor, QKeyEvent, QTextFormat, QPalette
+)
+
+BATCH_CACHE_VERSION = 1
+BATCH_FIELDS = ("path", "encoding", "total", "translated", "untranslated", "percentage", "error")
+STARTUP_BUDGET_MS = 1000
+STARTUP_WARMUP_DELAY_MS = 500
+WARMUP_MODULES = ("chardet",)
+BACKUP_FOLDER = "Backup"
+BACKUP_MIN_CHUNK = 16 * 1024
+BACKUP_MAX_CHUNK = 256 * 1024
+BACKUP_BOUNDARY_MODULUS = 32
+BACKUP_KEEP_RECENT = 50
+BACKUP_KEEP_DAYS = 30
+BACKUP_GC_INTERVAL_S = 600
+BACKUP_GC_GRACE_S = 3600
+BACKUP_PREVIEW_CHARS = 64 * 1024
+AUTO_SAVE_IDLE_MS = 2000
+AUTO_SAVE_MAX_INTERVAL_MS = 15000
+ENCODING_SAMPLE_SIZE = 256 * 1024
+ENCODING_READ_CHUNK = 1024 * 1024
+FALLBACK_ENCODING = 'TIS-620'
+LOAD_CHUNK_CHARS = 256 * 1024
+LOAD_QUEUE_SIZE = 8
+LOAD_BATCH_MS = 20
+LOAD_INSERT_CHARS = 16 * 1024
+SAVE_CHUNK_CHARS = 1024 * 1024
+SAVE_STREAM_THRESHOLD_CHARS = 16 * 1024 * 1024
+SAVE_FSYNC = True
+LARGE_SOURCE_THRESHOLD = 4 * 1024 * 1024
+SOURCE_VIEW_MAX_LINE_BYTES = 8 * 1024
+SOURCE_HASH_BATCH_LINES = 64 * 1024
+REPLACE_MERGE_GAP = 256
+REPLACE_MAX_EDITS = 2000
+BLOCK_TEXT_BATCH = 64
+BLOCK_INDEX_CHUNK = 1024
+PROGRESS_EAGER_BLOCKS = 2000
+PROGRESS_BATCH_BLOCKS = 5000
+PROGRESS_BATCH_MS = 15
+PROGRESS_REFRESH_MS = 250
+MARK_STRIP_WIDTH = 10
+GUTTER_PADDING = 6
+CURRENT_LINE_ALPHA = 40
+UNTRANSLATED_MARK_COLOR = "#E5534B"
+PLACEHOLDER_MARK_COLOR = "#D4A017"
+PLACEHOLDER_PROBLEMS_SHOWN = 1000
+HIGHLIGHT_REBUILD_MS = 300
+HIGHLIGHT_MAX_VISIBLE = 5000
+SEARCH_BATCH_SIZE = 200
+SEARCH_MAX_RESULTS = 5000
+SEARCH_PREVIEW_CHARS = 200
+REGEX_TIMEOUT_MS = 10000
+REGEX_PROGRESS_INTERVAL = 0.25
+REGEX_FRAME_MAGIC = b"RXWK"
+PROJECT_MAGIC = b"TEPROJ"
+PROJECT_VERSION = 2
+PROJECT_COMPRESS_LEVEL = 6
+TAB_MEMORY_BUDGET_CHARS = 32 * 1024 * 1024
+JOURNAL_SUFFIX = ".journal"
+LEGACY_PROJECT_SUFFIX = ".bak"
+JOURNAL_FLUSH_MS = 2000
+JOURNAL_COMPACT_BYTES = 8 * 1024 * 1024
+TRANSLATION_MEMORY_PATH = os.path.join(
+    QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation), "Text Editor", "translation_memory.db"
+)
+MEMORY_FLUSH_MS = 2000
+MEMORY_WRITE_BATCH = 256
+MEMORY_BUSY_TIMEOUT = 30
+MEMORY_GUI_BUSY_TIMEOUT = 0.05
+MEMORY_MAX_SUGGESTIONS = 8
+MEMORY_BANDS = 8
+MEMORY_BAND_ROWS = 2
+MEMORY_BAND_SCAN = 2000
+MEMORY_CANDIDATES = 60
+MEMORY_MIN_SIMILARITY = 0.5
+PROFILER_CAPACITY = 4096
+PROFILER_SLOW_MS = 50
+PROFILER_BUCKETS_MS = (1, 4, 16, 64, 256, 1000)
+PROFILER_EVENT_FIELDS = ("operation", "ms", "time", "detail", "thread")
+PROFILER_REFRESH_MS = 1000
+PROFILER_SLOW_SHOWN = 200
+
+
+class Measurement:
+    def __init__(self, profiler, name, detail):
+        self.profiler = profiler
+        self.name = name
+        self.detail = detail
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, self.started, self.detail)
+        return False
+
+
+class LatencyProfiler:
+    def __init__(self, capacity=PROFILER_CAPACITY):
+        self.enabled = False
+        self.capacity = capacity
+        self.idle = contextlib.nullcontext()
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.events = [None] * self.capacity
+            self.next = 0
+            self.recorded = 0
+
+    def measure(self, name, detail=""):
+        if not self.enabled:
+            return self.idle
+        return Measurement(self, name, detail)
+
+    def record(self, name, started, detail=""):
+        if not self.enabled:
+            return
+        event = (name, (time.perf_counter() - started) * 1000, time.time(), detail, threading.current_thread().name)
+        with self.lock:
+            self.events[self.next] = event
+            self.next = (self.next + 1) % self.capacity
+            self.recorded += 1
+
+    def snapshot(self):
+        with self.lock:
+            events = self.events[self.next:] + self.events[:self.next]
+        return [event for event in events if event is not None]
+
+    def summary(self, events=None):
+        durations = {}
+        for event in self.snapshot() if events is None else events:
+            durations.setdefault(event[0], []).append(event[1])
+        summary = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            histogram = [0] * (len(PROFILER_BUCKETS_MS) + 1)
+            for value in values:
+                histogram[bisect_right(PROFILER_BUCKETS_MS, value)] += 1
+            summary[name] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(values[len(values) // 2], 3),
+                "p95_ms": round(values[min(len(values) - 1, len(values) * 95 // 100)], 3),
+                "max_ms": round(values[-1], 3),
+                "histogram": histogram,
+            }
+        return summary
+
+    def slow_events(self, events=None, threshold_ms=PROFILER_SLOW_MS):
+        return [event for event in (self.snapshot() if events is None else events) if event[1] >= threshold_ms]
+
+    def export(self, path):
+        events = self.snapshot()
+        report = {
+            "exported": time.time(),
+            "recorded": self.recorded,
+            "capacity": self.capacity,
+            "slow_ms": PROFILER_SLOW_MS,
+            "buckets_ms": list(PROFILER_BUCKETS_MS),
+            "summary": self.summary(events),
+            "events": [
+                dict(zip(PROFILER_EVENT_FIELDS, (name, round(ms, 3), stamp, detail, thread)))
+                for name, ms, stamp, detail, thread in events
+            ],
+        }
+        write_file_atomic(path, json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+encoding_cache = {}
+digest_cache = {}
+latency_profiler = LatencyProfiler()
+
+
+def detect_bom_encoding(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return 'UTF-8-SIG'
+    if head.startswith(b'\xFF\xFE'):
+        return 'UTF-16-LE'
+    if head.startswith(b'\xFE\xFF'):
+        return 'UTF-16-BE'
+    return None
+
+
+def utf8_error_offset(file):
+    decoder = codecs.getincrementaldecoder('utf-8')('strict')
+    offset = file.tell()
+    while True:
+        chunk = file.read(ENCODING_READ_CHUNK)
+        pending = len(decoder.getstate()[0])
+        try:
+            decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as error:
+            return offset - pending + error.start
+        if not chunk:
+            return None
+        offset += len(chunk)
+
+
+def detect_sample_encoding(file):
+    import chardet
+
+    detector = chardet.UniversalDetector()
+    remaining = ENCODING_SAMPLE_SIZE
+    while remaining > 0 and not detector.done:
+        chunk = file.read(min(remaining, 64 * 1024))
+        if not chunk:
+            break
+        detector.feed(chunk)
+        remaining -= len(chunk)
+    detector.close()
+    encoding = detector.result.get('encoding')
+    if not encoding or encoding.lower() in ('ascii', 'utf-8'):
+        return FALLBACK_ENCODING
+    return encoding
+
+
+def detect_encoding(filepath):
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    cached = encoding_cache.get(filepath)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with latency_profiler.measure("detect_encoding", os.path.basename(filepath)), open(filepath, 'rb') as file:
+        encoding = detect_bom_encoding(file.read(4))
+        if encoding is None:
+            file.seek(0)
+            error_offset = utf8_error_offset(file)
+            if error_offset is None:
+                encoding = 'UTF-8'
+            else:
+                file.seek(error_offset)
+                encoding = detect_sample_encoding(file)
+
+    encoding_cache[filepath] = (stat.st_mtime_ns, stat.st_size, encoding)
+    return encoding
+
+
+def read_text_file(filepath, encoding):
+    with latency_profiler.measure("read_file", os.path.basename(filepath)), open(filepath, "r", encoding=encoding) as file:
+        text = file.read()
+    if bom_for_encoding(encoding) and text.startswith('\ufeff'):
+        text = text[1:]
+    return text
+
+
+def bom_for_encoding(encoding):
+    if encoding == 'UTF-16-LE':
+        return b'\xFF\xFE'
+    if encoding == 'UTF-16-BE':
+        return b'\xFE\xFF'
+    return None
+
+
+def detect_newline(filepath, encoding):
+    try:
+        with open(filepath, "r", encoding=encoding, errors="replace", newline="") as file:
+            head = file.read(ENCODING_READ_CHUNK)
+    except (OSError, LookupError):
+        return "\n"
+    if "\r\n" in head:
+        return "\r\n"
+    if head.count("\r") > head.count("\n"):
+        return "\r"
+    return "\n"
+
+
+@contextlib.contextmanager
+def atomic_file(path, sync=False):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory
+    )
+    try:
+        try:
+            shutil.copymode(path, temp_path)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+        with os.fdopen(fd, "wb") as temp_file:
+            yield temp_file
+            if sync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_file_atomic(path, data):
+    with atomic_file(path) as file:
+        file.write(data)
+
+
+def document_chunks(document, newline):
+    if document.characterCount() <= SAVE_STREAM_THRESHOLD_CHARS:
+        text = document.toRawText()
+        for start in range(0, len(text), SAVE_CHUNK_CHARS):
+            yield text[start:start + SAVE_CHUNK_CHARS].replace("\u2029", newline).replace("\u2028", newline)
+        return
+    lines, size = [], 0
+    block = document.begin()
+    while block.isValid():
+        text = block.text()
+        lines.append(text)
+        size += len(text)
+        block = block.next()
+        if size >= SAVE_CHUNK_CHARS and block.isValid():
+            yield (newline.join(lines) + newline).replace("\u2028", newline)
+            lines, size = [], 0
+    yield newline.join(lines).replace("\u2028", newline)
+
+
+def write_document_atomic(path, document, encoding, newline="\n", sync=SAVE_FSYNC):
+    encoder = codecs.getincrementalencoder(encoding)()
+    bom = bom_for_encoding(encoding)
+    with atomic_file(path, sync) as file:
+        if bom:
+            file.write(bom)
+        for chunk in document_chunks(document, newline):
+            file.write(encoder.encode(chunk))
+        file.write(encoder.encode("", final=True))
+
+
+def cached_digest(filepath, stat):
+    cached = digest_cache.get(filepath)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    return None
+
+
+def file_digest(filepath):
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    cached = cached_digest(filepath, stat)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        while True:
+            chunk = file.read(ENCODING_READ_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    digest_cache[filepath] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def file_reference(filepath):
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    reference = {"path": filepath, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    sha256 = cached_digest(filepath, stat)
+    if sha256:
+        reference["sha256"] = sha256
+    return reference
+
+
+def reference_matches(reference):
+    try:
+        stat = os.stat(reference["path"])
+    except OSError:
+        return False
+    if (stat.st_size, stat.st_mtime_ns) == (reference["size"], reference["mtime_ns"]):
+        return True
+    if "sha256" not in reference:
+        return False
+    return stat.st_size == reference["size"] and file_digest(reference["path"]) == reference["sha256"]
+
+
+def read_reference(reference, encoding):
+    if not encoding or not reference_matches(reference):
+        encoding = detect_encoding(reference["path"])
+    return read_text_file(reference["path"], encoding)
+
+
+def legacy_project_entry(data):
+    return {
+        "file2_path": data.get("file2_path"),
+        "font_size": data.get("font_size"),
+        "encoding": data.get("encoding"),
+        "file1_encoding": None,
+        "file1": None,
+        "source_text": data.get("source_text", ""),
+        "file2": None,
+        "target_text": data.get("target_text", ""),
+    }
+
+
+def write_project(project_path, entries, generation=None):
+    data = json.dumps(
+        {"version": PROJECT_VERSION, "journal": generation, "tabs": entries}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    header = PROJECT_MAGIC + bytes([PROJECT_VERSION])
+    write_file_atomic(project_path, header + zlib.compress(data, PROJECT_COMPRESS_LEVEL))
+
+
+def upgrade_project(project_path, entries, generation):
+    backup_path = project_path + LEGACY_PROJECT_SUFFIX
+    if os.path.exists(project_path) and not os.path.exists(backup_path):
+        shutil.copy2(project_path, backup_path)
+    write_project(project_path, entries, generation)
+
+
+def read_project(project_path):
+    with open(project_path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(PROJECT_MAGIC):
+        project_data = json.loads(data.decode('utf-8-sig'))
+        project_data["version"] = 1
+        return project_data
+
+    version = data[len(PROJECT_MAGIC)]
+    if version > PROJECT_VERSION:
+        raise ValueError(f"Unsupported project version {version}")
+    return json.loads(zlib.decompress(data[len(PROJECT_MAGIC) + 1:]).decode('utf-8'))
+
+
+def encode_journal_record(record):
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return len(data).to_bytes(4, "little") + zlib.crc32(data).to_bytes(4, "little") + data
+
+
+def read_journal(journal_path):
+    try:
+        with open(journal_path, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        return []
+
+    records = []
+    offset = 0
+    while offset + 8 <= len(data):
+        length = int.from_bytes(data[offset:offset + 4], "little")
+        payload = data[offset + 8:offset + 8 + length]
+        if len(payload) < length or zlib.crc32(payload) != int.from_bytes(data[offset + 4:offset + 8], "little"):
+            break
+        records.append(json.loads(payload.decode('utf-8')))
+        offset += 8 + length
+    return records
+
+
+def apply_journal_edits(text, edits):
+    document = QTextDocument()
+    document.setPlainText(text)
+    cursor = QTextCursor(document)
+    for position, removed, added in edits:
+        cursor.setPosition(position)
+        cursor.setPosition(position + removed, QTextCursor.KeepAnchor)
+        cursor.insertText(added)
+    return document.toPlainText()
+
+
+def replay_journal(project_data, records):
+    if not records or records[0] != ["base", project_data.get("journal")]:
+        return []
+
+    problems = []
+    entries = {}
+    order = []
+    for entry in project_data["tabs"]:
+        entry.setdefault("id", uuid.uuid4().hex)
+        entries[entry["id"]] = entry
+        order.append(entry["id"])
+
+    edits = {}
+    for record in records[1:]:
+        kind, tab_id = record[0], record[1]
+        if kind == "tab":
+            if tab_id not in entries:
+                entries[tab_id] = {"id": tab_id}
+                order.append(tab_id)
+            entries[tab_id].update(record[2])
+            if "file2" in record[2] or "target_text" in record[2]:
+                edits.pop(tab_id, None)
+        elif kind == "edit" and tab_id in entries:
+            edits.setdefault(tab_id, []).append(record[2:])
+        elif kind == "close" and tab_id in entries:
+            del entries[tab_id]
+            edits.pop(tab_id, None)
+            order.remove(tab_id)
+
+    for tab_id, tab_edits in edits.items():
+        entry = entries[tab_id]
+        try:
+            if entry.get("file2"):
+                text = read_reference(entry["file2"], entry.get("encoding"))
+            else:
+                text = entry.get("target_text") or ""
+        except (OSError, UnicodeError, LookupError) as error:
+            problems.append(f"กู้คืนการแก้ไขไม่สำเร็จ: {entry.get('file2_path')} ({error})")
+            continue
+        entry["target_text"] = apply_journal_edits(text, tab_edits)
+        entry["file2"] = None
+
+    project_data["tabs"] = [entries[tab_id] for tab_id in order]
+    return problems
+
+
+class TaskSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class BackgroundTask(QRunnable):
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as error:
+            self.emit(self.signals.failed, error)
+        else:
+            self.emit(self.signals.finished, result)
+
+    def emit(self, signal, value):
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            pass
+
+
+def backup_chunks(text):
+    chunk = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        data = line.encode('utf-8', 'surrogatepass')
+        chunk.append(data)
+        size += len(data)
+        if size >= BACKUP_MAX_CHUNK or (
+            size >= BACKUP_MIN_CHUNK and zlib.crc32(data) % BACKUP_BOUNDARY_MODULUS == 0
+        ):
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def backup_versions_folder(root, path):
+    key = hashlib.sha256(os.path.abspath(path).encode('utf-8', 'surrogatepass')).hexdigest()[:24]
+    return os.path.join(root, "versions", key)
+
+
+def backup_object_path(root, digest):
+    return os.path.join(root, "objects", digest[:2], digest[2:])
+
+
+def store_backup(root, path, text, encoding):
+    digests = []
+    for chunk in backup_chunks(text):
+        digest = hashlib.sha256(chunk).hexdigest()
+        object_path = backup_object_path(root, digest)
+        try:
+            os.utime(object_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            write_file_atomic(object_path, zlib.compress(chunk))
+        digests.append(digest)
+
+    folder = backup_versions_folder(root, path)
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = os.path.join(folder, f"{time.time_ns()}.json")
+    manifest = {
+        "path": os.path.abspath(path),
+        "encoding": encoding,
+        "time": time.time(),
+        "chars": len(text),
+        "chunks": digests,
+    }
+    write_file_atomic(manifest_path, json.dumps(manifest).encode('utf-8'))
+    if prune_backups(root, path):
+        collect_backup_garbage(root)
+    return manifest_path
+
+
+def list_backups(root, path):
+    return read_manifests(backup_versions_folder(root, path))
+
+
+def read_manifests(folder):
+    try:
+        names = sorted((name for name in os.listdir(folder) if name.endswith(".json")), reverse=True)
+    except FileNotFoundError:
+        return []
+    manifests = []
+    for name in names:
+        try:
+            with open(os.path.join(folder, name), 'rb') as file:
+                manifest = json.loads(file.read().decode('utf-8'))
+        except (OSError, ValueError):
+            continue
+        manifest["file"] = os.path.join(folder, name)
+        manifests.append(manifest)
+    return manifests
+
+
+def load_backup(root, manifest, max_chars=None):
+    parts = []
+    size = 0
+    for digest in manifest["chunks"]:
+        with open(backup_object_path(root, digest), 'rb') as file:
+            part = zlib.decompress(file.read()).decode('utf-8', 'surrogatepass')
+        parts.append(part)
+        size += len(part)
+        if max_chars is not None and size >= max_chars:
+            break
+    text = "".join(parts)
+    return text if max_chars is None else text[:max_chars]
+
+
+def prune_backups(root, path, now=None):
+    now = time.time() if now is None else now
+    kept_days = set()
+    removed = 0
+    for index, manifest in enumerate(list_backups(root, path)):
+        age_days = int((now - manifest["time"]) // 86400)
+        if index < BACKUP_KEEP_RECENT:
+            kept_days.add(age_days)
+            continue
+        if age_days < BACKUP_KEEP_DAYS and age_days not in kept_days:
+            kept_days.add(age_days)
+            continue
+        try:
+            os.remove(manifest["file"])
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def collect_backup_garbage(root, force=False):
+    marker = os.path.join(root, "gc")
+    now = time.time()
+    try:
+        if not force and now - os.path.getmtime(marker) < BACKUP_GC_INTERVAL_S:
+            return 0
+    except OSError:
+        pass
+    with open(marker, 'wb'):
+        pass
+
+    live = set()
+    versions = os.path.join(root, "versions")
+    for key in os.listdir(versions) if os.path.isdir(versions) else []:
+        for manifest in read_manifests(os.path.join(versions, key)):
+            live.update(manifest["chunks"])
+
+    removed = 0
+    objects = os.path.join(root, "objects")
+    for prefix in os.listdir(objects) if os.path.isdir(objects) else []:
+        folder = os.path.join(objects, prefix)
+        for name in os.listdir(folder):
+            object_path = os.path.join(folder, name)
+            if prefix + name in live:
+                continue
+            try:
+                if now - os.path.getmtime(object_path) > BACKUP_GC_GRACE_S:
+                    os.remove(object_path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class AutoSaver(QObject):
+    saved = Signal(str)
+    failed = Signal(object)
+
+    def __init__(self, tab, idle_ms=AUTO_SAVE_IDLE_MS, max_interval_ms=AUTO_SAVE_MAX_INTERVAL_MS):
+        super().__init__(tab)
+        self.tab = tab
+        self.idle_ms = idle_ms
+        self.max_interval_ms = max_interval_ms
+        self.pending = False
+        self.task = None
+        self.task_revision = None
+        self.task_started = None
+        self.saved_revision = None
+        self.error_reported = False
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.flush)
+        self.max_timer = QTimer(self)
+        self.max_timer.setSingleShot(True)
+        self.max_timer.timeout.connect(self.flush)
+
+    def schedule(self):
+        if not self.tab.file2_path or self.tab.is_loading(self.tab.target_text_area):
+            return
+        self.pending = True
+        self.idle_timer.start(self.idle_ms)
+        if not self.max_timer.isActive():
+            self.max_timer.start(self.max_interval_ms)
+
+    def flush(self):
+        self.idle_timer.stop()
+        self.max_timer.stop()
+        if not self.pending or not self.tab.file2_path:
+            return
+        if self.task is not None:
+            return
+
+        document = self.tab.target_text_area.document()
+        revision = (self.tab.file2_path, document.revision())
+        self.pending = False
+        if revision == self.saved_revision:
+            return
+
+        encoding = self.tab.file2_encoding or "UTF-8"
+        self.task_revision = revision
+        self.task_started = time.perf_counter()
+        with latency_profiler.measure("auto_save_snapshot"):
+            text = document.toPlainText()
+        self.task = BackgroundTask(store_backup, BACKUP_FOLDER, self.tab.file2_path, text, encoding)
+        self.task.signals.finished.connect(self.on_task_finished)
+        self.task.signals.failed.connect(self.on_task_failed)
+        self.task.setAutoDelete(False)
+        QThreadPool.globalInstance().start(self.task)
+
+    def on_task_finished(self, manifest_path):
+        self.task = None
+        latency_profiler.record("auto_save", self.task_started, os.path.basename(self.tab.file2_path or ""))
+        self.saved_revision = self.task_revision
+        self.error_reported = False
+        self.saved.emit(manifest_path)
+        self.resume_pending()
+
+    def on_task_failed(self, error):
+        self.task = None
+        if not self.error_reported:
+            self.error_reported = True
+            self.failed.emit(error)
+        self.resume_pending()
+
+    def resume_pending(self):
+        if self.pending and not self.idle_timer.isActive():
+            self.flush()
+
+    def cancel(self):
+        self.idle_timer.stop()
+        self.max_timer.stop()
+        self.pending = False
+
+    def mark_saved(self):
+        self.cancel()
+        self.saved_revision = (self.tab.file2_path, self.tab.target_text_area.document().revision())
+
+
+class ProjectJournal(QObject):
+    failed = Signal(object)
+
+    def __init__(self, project_path, generation, entries, parent=None):
+        super().__init__(parent)
+        self.project_path = project_path
+        self.journal_path = project_path + JOURNAL_SUFFIX
+        self.generation = generation
+        self.entries = entries
+        self.pending = []
+        self.size = 0
+        self.task = None
+        self.task_generation = None
+        self.task_started = None
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def start(self, fresh):
+        if fresh:
+            self.rewrite()
+        else:
+            try:
+                self.size = os.path.getsize(self.journal_path)
+            except OSError:
+                self.rewrite()
+
+    def record(self, record):
+        last = self.pending[-1] if self.pending else None
+        if (
+            record[0] == "edit" and last is not None and last[0] == "edit" and last[1] == record[1]
+            and last[3] == 0 and record[3] == 0 and record[2] == last[2] + document_length(last[4])
+        ):
+            last[4] += record[4]
+        else:
+            self.pending.append(record)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(JOURNAL_FLUSH_MS)
+
+    def flush(self):
+        self.flush_timer.stop()
+        if self.task is not None or not self.pending:
+            return
+        data = b"".join(encode_journal_record(record) for record in self.pending)
+        try:
+            with latency_profiler.measure("journal_flush"), open(self.journal_path, "ab") as journal:
+                journal.write(data)
+        except OSError as error:
+            self.failed.emit(error)
+            return
+        self.pending = []
+        self.size += len(data)
+        if self.size > JOURNAL_COMPACT_BYTES:
+            self.compact()
+
+    def rewrite(self):
+        data = encode_journal_record(["base", self.generation])
+        data += b"".join(encode_journal_record(record) for record in self.pending)
+        try:
+            write_file_atomic(self.journal_path, data)
+        except OSError as error:
+            self.failed.emit(error)
+            return
+        self.pending = []
+        self.size = len(data)
+
+    def compact(self):
+        if self.task is not None:
+            return
+        self.flush()
+        self.task_generation = uuid.uuid4().hex
+        self.task_started = time.perf_counter()
+        write = upgrade_project if self.generation is None else write_project
+        self.task = BackgroundTask(write, self.project_path, self.entries(), self.task_generation)
+        self.task.signals.finished.connect(self.on_compacted)
+        self.task.signals.failed.connect(self.on_compact_failed)
+        self.task.setAutoDelete(False)
+        QThreadPool.globalInstance().start(self.task)
+
+    def on_compacted(self, result):
+        self.task = None
+        latency_profiler.record("journal_compact", self.task_started)
+        self.generation = self.task_generation
+        self.rewrite()
+
+    def on_compact_failed(self, error):
+        self.task = None
+        self.failed.emit(error)
+        self.flush()
+
+    def close(self):
+        if self.task is not None:
+            QThreadPool.globalInstance().waitForDone()
+            QApplication.sendPostedEvents()
+        self.flush()
+
+
+MEMORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    source_hash INTEGER NOT NULL,
+    target_hash INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    origin TEXT,
+    used REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS segments_pair ON segments (source_hash, target_hash);
+CREATE TABLE IF NOT EXISTS harvested (key TEXT PRIMARY KEY, stamp TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS segment_bands (
+    band INTEGER NOT NULL,
+    source_hash INTEGER NOT NULL,
+    PRIMARY KEY (band, source_hash)
+) WITHOUT ROWID;
+"""
+MEMORY_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(b"a%d" % index, digest_size=4).digest(), 'little') | 1,
+        int.from_bytes(hashlib.blake2b(b"b%d" % index, digest_size=4).digest(), 'little'),
+    )
+    for index in range(MEMORY_BANDS * MEMORY_BAND_ROWS)
+]
+
+
+def segment_hash(text):
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def segment_pairs(source_text, target_text):
+    for source, target in zip(source_text.split('\n'), target_text.split('\n')):
+        source, target = source.strip(), target.strip()
+        if source and target and source != target:
+            yield source, target
+
+
+def segment_bands(text):
+    text = text.lower()
+    grams = {zlib.crc32(text[index:index + 3].encode('utf-8', 'surrogatepass')) for index in range(len(text) - 2)}
+    if not grams:
+        return []
+    signature = [min((gram * factor + offset) & 0xFFFFFFFF for gram in grams) for factor, offset in MEMORY_PERMUTATIONS]
+    return [
+        segment_hash(f"{band}:{signature[band * MEMORY_BAND_ROWS:(band + 1) * MEMORY_BAND_ROWS]}")
+        for band in range(MEMORY_BANDS)
+    ]
+
+
+def open_translation_memory(path, timeout=MEMORY_BUSY_TIMEOUT):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=timeout)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(MEMORY_SCHEMA)
+    return connection
+
+
+def store_segments(connection, segments):
+    now = time.time()
+    segments = iter(segments)
+    while batch := [
+        (segment_hash(source), segment_hash(target), source, target, origin)
+        for source, target, origin in islice(segments, MEMORY_WRITE_BATCH)
+    ]:
+        source_hashes = list({row[0] for row in batch})
+        known = {row[0] for row in connection.execute(
+            f"SELECT DISTINCT source_hash FROM segments WHERE source_hash IN ({','.join('?' * len(source_hashes))})",
+            source_hashes,
+        )}
+        bands = {}
+        for source_hash, target_hash, source, target, origin in batch:
+            if source_hash not in known and source_hash not in bands:
+                bands[source_hash] = segment_bands(source)
+        with connection:
+            for source_hash, target_hash, source, target, origin in batch:
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO segments (source_hash, target_hash, source, target, origin, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (source_hash, target_hash, source, target, origin, now),
+                ).rowcount
+                if inserted:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO segment_bands (band, source_hash) VALUES (?, ?)",
+                        ((band, source_hash) for band in bands.get(source_hash, ())),
+                    )
+                else:
+                    connection.execute(
+                        "UPDATE segments SET used = ? WHERE source_hash = ? AND target_hash = ?",
+                        (now, source_hash, target_hash),
+                    )
+
+
+def database_locked(error):
+    return "locked" in str(error) or "busy" in str(error)
+
+
+def lookup_segments(connection, text, limit=MEMORY_MAX_SUGGESTIONS):
+    text = text.strip()
+    if not text:
+        return []
+    suggestions = []
+    for source, target in connection.execute(
+        "SELECT source, target FROM segments WHERE source_hash = ? ORDER BY used DESC LIMIT ?",
+        (segment_hash(text), limit),
+    ):
+        if source == text:
+            suggestions.append((1.0, source, target))
+    bands = segment_bands(text)
+    if not bands or len(suggestions) >= limit:
+        return suggestions
+
+    candidates = [row[0] for row in connection.execute(
+        f"SELECT source_hash FROM (SELECT source_hash FROM segment_bands WHERE band IN ({','.join('?' * len(bands))}) "
+        "LIMIT ?) GROUP BY source_hash ORDER BY COUNT(*) DESC LIMIT ?",
+        (*bands, MEMORY_BAND_SCAN, MEMORY_CANDIDATES),
+    )]
+    if not candidates:
+        return suggestions
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(text)
+    seen = {target for score, source, target in suggestions}
+    fuzzy_matches = []
+    for source, target in connection.execute(
+        f"SELECT source, target FROM segments WHERE source_hash IN ({','.join('?' * len(candidates))}) "
+        "ORDER BY used DESC",
+        candidates,
+    ):
+        if source == text or target in seen:
+            continue
+        matcher.set_seq1(source)
+        if matcher.real_quick_ratio() >= MEMORY_MIN_SIMILARITY and matcher.quick_ratio() >= MEMORY_MIN_SIMILARITY:
+            score = matcher.ratio()
+            if score >= MEMORY_MIN_SIMILARITY:
+                seen.add(target)
+                fuzzy_matches.append((score, source, target))
+    fuzzy_matches.sort(key=lambda match: match[0], reverse=True)
+    return (suggestions + fuzzy_matches)[:limit]
+
+
+def harvest_translation_memory(memory_path, entries):
+    connection = open_translation_memory(memory_path)
+    added = 0
+    try:
+        for entry in entries:
+            source_reference, target_reference = entry.get("file1"), entry.get("file2")
+            key = stamp = None
+            if source_reference and target_reference:
+                key = source_reference["path"] + "\n" + target_reference["path"]
+                stamp = json.dumps([source_reference, target_reference], sort_keys=True)
+                row = connection.execute("SELECT stamp FROM harvested WHERE key = ?", (key,)).fetchone()
+                if row and row[0] == stamp:
+                    continue
+            try:
+                if source_reference:
+                    source_text = read_reference(source_reference, entry.get("file1_encoding"))
+                else:
+                    source_text = entry.get("source_text") or ""
+                if target_reference:
+                    target_text = read_reference(target_reference, entry.get("encoding"))
+                else:
+                    target_text = entry.get("target_text") or ""
+            except (OSError, UnicodeError, LookupError):
+                continue
+            origin = os.path.basename(entry.get("file2_path") or "")
+            pairs = list(segment_pairs(source_text, target_text))
+            store_segments(connection, ((source, target, origin) for source, target in pairs))
+            if key:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO harvested (key, stamp) VALUES (?, ?)", (key, stamp))
+            added += len(pairs)
+    finally:
+        connection.close()
+    return added
+
+
+def import_project_memory(memory_path, project_path):
+    project_data = read_project(project_path)
+    if project_data["version"] == 1:
+        project_data["tabs"] = [legacy_project_entry(tab_data) for tab_data in project_data["tabs"]]
+    replay_journal(project_data, read_journal(project_path + JOURNAL_SUFFIX))
+    return harvest_translation_memory(memory_path, project_data["tabs"])
+
+
+class TranslationMemory(QObject):
+    harvested = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.connection = None
+        self.pending = []
+        self.tasks = []
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def open(self):
+        if self.connection is None:
+            self.connection = open_translation_memory(self.path, MEMORY_GUI_BUSY_TIMEOUT)
+        return self.connection
+
+    def remember(self, source, target, origin):
+        source, target = source.strip(), target.strip()
+        if source and target and source != target:
+            self.pending.append((source, target, origin))
+            if not self.flush_timer.isActive():
+                self.flush_timer.start(MEMORY_FLUSH_MS)
+
+    def flush(self):
+        self.flush_timer.stop()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        try:
+            store_segments(self.open(), pending)
+        except sqlite3.OperationalError as error:
+            self.pending = pending + self.pending
+            if not database_locked(error):
+                self.failed.emit(error)
+            elif not self.flush_timer.isActive():
+                self.flush_timer.start(MEMORY_FLUSH_MS)
+        except sqlite3.Error as error:
+            self.failed.emit(error)
+
+    def lookup(self, text):
+        self.flush()
+        try:
+            return lookup_segments(self.open(), text)
+        except sqlite3.OperationalError as error:
+            if not database_locked(error):
+                self.failed.emit(error)
+            return []
+        except sqlite3.Error as error:
+            self.failed.emit(error)
+            return []
+
+    def harvest(self, entries):
+        self.start_task(harvest_translation_memory, entries)
+
+    def import_project(self, project_path):
+        self.start_task(import_project_memory, project_path)
+
+    def start_task(self, function, argument):
+        task = BackgroundTask(function, self.path, argument)
+        task.signals.finished.connect(lambda added: self.on_task_finished(task, added))
+        task.signals.failed.connect(lambda error: self.on_task_failed(task, error))
+        task.setAutoDelete(False)
+        self.tasks.append(task)
+        QThreadPool.globalInstance().start(task)
+
+    def on_task_finished(self, task, added):
+        self.tasks.remove(task)
+        self.harvested.emit(added)
+
+    def on_task_failed(self, task, error):
+        self.tasks.remove(task)
+        self.failed.emit(error)
+
+    def close(self):
+        if self.pending:
+            try:
+                self.open().execute(f"PRAGMA busy_timeout = {MEMORY_BUSY_TIMEOUT * 1000}")
+            except sqlite3.Error as error:
+                self.failed.emit(error)
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class FileLoader(QObject):
+    progress = Signal(int)
+    finished = Signal()
+    failed = Signal(object)
+
+    DONE = object()
+
+    def __init__(self, document, filepath, encoding, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.filepath = filepath
+        self.encoding = encoding
+        self.file_size = max(os.path.getsize(filepath), 1)
+        self.percent = 0
+        self.chunks = queue.Queue(maxsize=LOAD_QUEUE_SIZE)
+        self.cancelled = threading.Event()
+        self.task = None
+        self.pending_text = ""
+        self.pending_offset = 0
+        self.started = None
+        self.inserting = False
+        self.edited = False
+        self.load_end = 0
+
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setInterval(0)
+        self.drain_timer.timeout.connect(self.drain)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.document.setUndoRedoEnabled(False)
+        with latency_profiler.measure("clear_document"):
+            self.document.setPlainText("")
+        self.document.contentsChange.connect(self.on_contents_change)
+        self.task = BackgroundTask(self.read_chunks)
+        QThreadPool.globalInstance().start(self.task)
+        self.drain_timer.start()
+
+    def read_chunks(self):
+        try:
+            with open(self.filepath, "r", encoding=self.encoding) as file:
+                first_chunk = True
+                while not self.cancelled.is_set():
+                    text = file.read(LOAD_CHUNK_CHARS)
+                    if not text:
+                        break
+                    if first_chunk and bom_for_encoding(self.encoding) and text.startswith('\ufeff'):
+                        text = text[1:]
+                    first_chunk = False
+                    self.put((text, file.buffer.tell()))
+            self.put(self.DONE)
+        except Exception as error:
+            self.put(error)
+
+    def put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def drain(self):
+        elapsed = QElapsedTimer()
+        elapsed.start()
+        cursor = QTextCursor(self.document)
+        position = None
+        while elapsed.elapsed() < LOAD_BATCH_MS:
+            if self.pending_offset < len(self.pending_text):
+                end = self.pending_offset + LOAD_INSERT_CHARS
+                cursor.setPosition(self.load_end)
+                self.inserting = True
+                cursor.insertText(self.pending_text[self.pending_offset:end])
+                self.inserting = False
+                self.load_end = cursor.position()
+                self.pending_offset = end
+                continue
+            try:
+                item = self.chunks.get_nowait()
+            except queue.Empty:
+                break
+            if item is self.DONE:
+                self.stop()
+                latency_profiler.record("open_file", self.started, os.path.basename(self.filepath))
+                self.percent = 100
+                self.progress.emit(self.percent)
+                self.finished.emit()
+                return
+            if isinstance(item, Exception):
+                self.stop()
+                self.failed.emit(item)
+                return
+            self.pending_text, position = item
+            self.pending_offset = 0
+        if position is not None:
+            self.percent = min(99, position * 100 // self.file_size)
+            self.progress.emit(self.percent)
+
+    def on_contents_change(self, position, chars_removed, chars_added):
+        if self.inserting:
+            return
+        self.edited = True
+        if position < self.load_end:
+            if position + chars_removed > self.load_end:
+                self.load_end = position + chars_added
+            else:
+                self.load_end += chars_added - chars_removed
+
+    def stop(self):
+        if not self.drain_timer.isActive():
+            return
+        self.drain_timer.stop()
+        self.document.contentsChange.disconnect(self.on_contents_change)
+        self.document.setUndoRedoEnabled(True)
+        if not self.edited:
+            self.document.setModified(False)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.stop()
+        while True:
+            try:
+                self.chunks.get_nowait()
+            except queue.Empty:
+                break
+
+
+NEWLINE_PATTERNS = {
+    'UTF-16-LE': re.compile(b'\n\x00'),
+    'UTF-16-BE': re.compile(b'\x00\n'),
+}
+DEFAULT_NEWLINE_PATTERN = re.compile(b'\n')
+
+
+def build_line_index(data, start, encoding):
+    pattern = NEWLINE_PATTERNS.get(encoding, DEFAULT_NEWLINE_PATTERN)
+    offsets = array('I' if len(data) < 2 ** 32 else 'Q', [start])
+    if pattern is DEFAULT_NEWLINE_PATTERN:
+        offsets.extend(match.end() for match in pattern.finditer(data, start))
+    else:
+        offsets.extend(
+            match.end() for match in pattern.finditer(data, start) if (match.start() - start) % 2 == 0
+        )
+    return offsets
+
+
+def hash_mapped_lines(data, offsets, codec, function):
+    hashes = array('q')
+    for first in range(0, len(offsets), SOURCE_HASH_BATCH_LINES):
+        last = min(first + SOURCE_HASH_BATCH_LINES, len(offsets))
+        end = offsets[last] if last < len(offsets) else len(data)
+        lines = data[offsets[first]:end].decode(codec, errors='replace').split('\n')
+        if last < len(offsets):
+            lines.pop()
+        hashes.extend(map(function, (line.rstrip('\r') for line in lines)))
+    return hashes
+
+
+class LineNumberGutter(QWidget):
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def sizeHint(self):
+        return QSize(self.editor.gutter_width(), 0)
+
+    def paintEvent(self, event):
+        self.editor.paint_gutter(event)
+
+
+class PlainTextEditor(QPlainTextEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.selection_layers = {}
+        self.gutter_digits = 0
+        self.gutter = LineNumberGutter(self)
+        self.blockCountChanged.connect(self.update_gutter_width)
+        self.updateRequest.connect(self.update_gutter)
+        self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.update_gutter_width()
+        self.highlight_current_line()
+
+    def gutter_width(self):
+        return self.fontMetrics().horizontalAdvance('9') * self.gutter_digits + 2 * GUTTER_PADDING
+
+    def update_gutter_width(self):
+        digits = len(str(self.blockCount()))
+        if digits != self.gutter_digits:
+            self.gutter_digits = digits
+            self.update_margins()
+
+    def update_margins(self):
+        width = self.gutter_width()
+        self.setViewportMargins(width, 0, 0, 0)
+        rect = self.contentsRect()
+        self.gutter.setGeometry(rect.left(), rect.top(), width, rect.height())
+
+    def update_gutter(self, rect, dy):
+        if dy:
+            self.gutter.scroll(0, dy)
+        else:
+            self.gutter.update(0, rect.y(), self.gutter.width(), rect.height())
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self.update_margins()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_margins()
+
+    def paint_gutter(self, event):
+        painter = QPainter(self.gutter)
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.window())
+        block = self.firstVisibleBlock()
+        number = block.blockNumber()
+        current = self.textCursor().blockNumber()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        width = self.gutter.width() - GUTTER_PADDING
+        while block.isValid() and top <= event.rect().bottom():
+            bottom = top + round(self.blockBoundingRect(block).height())
+            if block.isVisible() and bottom >= event.rect().top():
+                painter.setPen(palette.color(QPalette.Text if number == current else QPalette.PlaceholderText))
+                painter.drawText(0, top, width, bottom - top, Qt.AlignRight | Qt.AlignVCenter, str(number + 1))
+            block = block.next()
+            top = bottom
+            number += 1
+
+    def highlight_current_line(self):
+        color = QColor(self.palette().color(QPalette.Highlight))
+        color.setAlpha(CURRENT_LINE_ALPHA)
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(color)
+        selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+        selection.cursor = self.textCursor()
+        selection.cursor.clearSelection()
+        self.set_selection_layer("current_line", [selection])
+        self.gutter.update()
+
+    def set_selection_layer(self, name, selections):
+        if not selections and not self.selection_layers.get(name):
+            return
+        self.selection_layers[name] = selections
+        self.setExtraSelections([selection for layer in self.selection_layers.values() for selection in layer])
+
+    def top_line(self):
+        return self.verticalScrollBar().value()
+
+    def scroll_to_line(self, line):
+        self.verticalScrollBar().setValue(int(line))
+
+
+class MappedSourceView(QAbstractScrollArea):
+    hashes_built = Signal(object)
+    placeholders_built = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filepath = None
+        self.file = None
+        self.data = None
+        self.encoding = None
+        self.codec = None
+        self.line_offsets = array('I', [0])
+        self.generation = 0
+        self.tasks = {}
+        self.index_task = None
+        self.hash_tasks = []
+        self.selection_anchor = None
+        self.selection_end = None
+        self.text_width = 0
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.update_metrics()
+
+    def open_file(self, filepath, encoding):
+        self.close_file()
+        self.filepath = filepath
+        self.encoding = encoding
+        self.codec = 'utf-8' if encoding == 'UTF-8-SIG' else encoding
+        self.file = open(filepath, 'rb')
+        if os.path.getsize(filepath):
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+        bom = codecs.BOM_UTF8 if encoding == 'UTF-8-SIG' else bom_for_encoding(encoding)
+        start = len(bom) if bom and self.data[:len(bom)] == bom else 0
+        self.line_offsets = array('I', [start])
+        self.text_width = 0
+        self.index_task = self.start_task(self.on_index_built, build_line_index, self.data, start, encoding)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def start_task(self, handler, function, *args):
+        task = BackgroundTask(function, *args)
+        generation = self.generation
+        task.signals.finished.connect(lambda result: self.on_task_finished(task, generation, handler, result))
+        task.signals.failed.connect(lambda error: self.on_task_finished(task, generation, None, error))
+        task.setAutoDelete(False)
+        self.tasks[task] = (self.data, self.file)
+        QThreadPool.globalInstance().start(task)
+        return task
+
+    def on_task_finished(self, task, generation, handler, result):
+        data, file = self.tasks.pop(task)
+        if generation != self.generation:
+            if file is not self.file and not any(other is file for _, other in self.tasks.values()):
+                self.release(data, file)
+            return
+        if handler:
+            handler(task, result)
+
+    def release(self, data, file):
+        if isinstance(data, mmap.mmap):
+            try:
+                data.close()
+            except BufferError:
+                pass
+        if file:
+            file.close()
+
+    def on_index_built(self, task, offsets):
+        if task is not self.index_task:
+            return
+        self.index_task = None
+        self.line_offsets = offsets
+        self.update_scrollbars()
+        self.viewport().update()
+        self.start_hash_task(line_hash, self.hashes_built)
+        self.start_hash_task(placeholder_key, self.placeholders_built)
+
+    def start_hash_task(self, function, signal):
+        handler = lambda task, hashes: self.on_hashes_built(task, hashes, signal)
+        task = self.start_task(handler, hash_mapped_lines, self.data, self.line_offsets, self.codec, function)
+        self.hash_tasks.append(task)
+
+    def on_hashes_built(self, task, hashes, signal):
+        if task not in self.hash_tasks:
+            return
+        self.hash_tasks.remove(task)
+        signal.emit(hashes)
+
+    def close_file(self):
+        self.generation += 1
+        self.index_task = None
+        self.hash_tasks = []
+        if not any(file is self.file for _, file in self.tasks.values()):
+            self.release(self.data, self.file)
+        self.filepath = None
+        self.file = None
+        self.data = None
+        self.line_offsets = array('I', [0])
+        self.selection_anchor = None
+        self.selection_end = None
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def is_open(self):
+        return self.data is not None
+
+    def line_count(self):
+        if self.data is None or self.index_task is not None:
+            return 0
+        return len(self.line_offsets)
+
+    def line_text(self, line_number, max_bytes=None):
+        start = self.line_offsets[line_number]
+        if line_number + 1 < len(self.line_offsets):
+            end = self.line_offsets[line_number + 1]
+        else:
+            end = len(self.data)
+        if max_bytes is not None and end - start > max_bytes:
+            end = start + max_bytes - max_bytes % 2
+        return self.data[start:end].decode(self.codec, errors='replace').rstrip('\r\n')
+
+    def toPlainText(self):
+        if self.data is None:
+            return ""
+        start = self.line_offsets[0]
+        text = self.data[start:].decode(self.codec, errors='replace')
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def update_metrics(self):
+        metrics = QFontMetrics(self.font())
+        self.line_height = max(metrics.lineSpacing(), 1)
+        self.char_width = max(metrics.averageCharWidth(), 1)
+        self.verticalScrollBar().setSingleStep(self.line_height)
+        self.horizontalScrollBar().setSingleStep(self.char_width * 4)
+        self.update_scrollbars()
+
+    def setFont(self, font):
+        super().setFont(font)
+        self.text_width = 0
+        self.update_metrics()
+        self.viewport().update()
+
+    def update_scrollbars(self):
+        viewport_height = self.viewport().height()
+        content_height = self.line_count() * self.line_height
+        self.verticalScrollBar().setPageStep(viewport_height)
+        self.verticalScrollBar().setRange(0, max(0, content_height - viewport_height))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+        self.horizontalScrollBar().setRange(0, max(0, self.text_width - self.viewport().width()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def top_line(self):
+        return self.verticalScrollBar().value() / self.line_height
+
+    def scroll_to_line(self, line):
+        self.verticalScrollBar().setValue(round(line * self.line_height))
+
+    def visible_lines(self):
+        first = self.verticalScrollBar().value() // self.line_height
+        last = min(self.line_count(), first + self.viewport().height() // self.line_height + 2)
+        return first, last
+
+    def selected_range(self):
+        if self.selection_anchor is None:
+            return None
+        return (min(self.selection_anchor, self.selection_end), max(self.selection_anchor, self.selection_end))
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.base())
+        if self.data is None:
+            return
+        if self.index_task is not None:
+            painter.setPen(palette.text().color())
+            painter.drawText(self.viewport().rect(), Qt.AlignCenter, "กำลังสร้างดัชนีบรรทัด...")
+            return
+
+        metrics = QFontMetrics(self.font())
+        first, last = self.visible_lines()
+        x = 4 - self.horizontalScrollBar().value()
+        y = first * self.line_height - self.verticalScrollBar().value()
+        selection = self.selected_range()
+        widest = self.text_width
+        for line_number in range(first, last):
+            text = self.line_text(line_number, SOURCE_VIEW_MAX_LINE_BYTES).expandtabs(4)
+            if selection and selection[0] <= line_number <= selection[1]:
+                painter.fillRect(0, y, self.viewport().width(), self.line_height, palette.highlight())
+                painter.setPen(palette.highlightedText().color())
+            else:
+                painter.setPen(palette.text().color())
+            painter.drawText(x, y + metrics.ascent(), text)
+            widest = max(widest, metrics.horizontalAdvance(text) + 8)
+            y += self.line_height
+        painter.end()
+
+        if widest > self.text_width:
+            self.text_width = widest
+            self.update_scrollbars()
+
+    def line_at(self, y):
+        line_number = (y + self.verticalScrollBar().value()) // self.line_height
+        return max(0, min(line_number, self.line_count() - 1))
+
+    def mousePressEvent(self, event):
+        if self.data is None or event.button() != Qt.LeftButton:
+            return
+        line_number = self.line_at(int(event.position().y()))
+        if not (event.modifiers() & Qt.ShiftModifier) or self.selection_anchor is None:
+            self.selection_anchor = line_number
+        self.selection_end = line_number
+        self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if self.selection_anchor is not None and event.buttons() & Qt.LeftButton:
+            self.selection_end = self.line_at(int(event.position().y()))
+            self.viewport().update()
+
+    def show_line(self, line_number):
+        if not 0 <= line_number < self.line_count():
+            return
+        self.selection_anchor = self.selection_end = line_number
+        first, last = self.visible_lines()
+        if not first <= line_number < last - 1:
+            self.verticalScrollBar().setValue(
+                line_number * self.line_height - self.viewport().height() // 2
+            )
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            selection = self.selected_range()
+            if selection:
+                lines = (self.line_text(n) for n in range(selection[0], selection[1] + 1))
+                QApplication.clipboard().setText("\n".join(lines))
+            return
+        super().keyPressEvent(event)
+
+
+EXTENDED_ESCAPE_PATTERN = re.compile(r'\\(x[0-9A-Fa-f]{2}|[nrt0\\])')
+EXTENDED_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '0': '\0', '\\': '\\'}
+ASTRAL_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+
+
+def expand_extended(text):
+    def replace(match):
+        code = match.group(1)
+        if code[0] == 'x':
+            return chr(int(code[1:], 16))
+        return EXTENDED_ESCAPES[code]
+    return EXTENDED_ESCAPE_PATTERN.sub(replace, text)
+
+
+def compile_search_pattern(text, mode, match_case):
+    flags = 0 if match_case else re.IGNORECASE
+    if mode == "regex":
+        return re.compile(text, flags | re.MULTILINE)
+    if mode == "extended":
+        return re.compile(re.escape(expand_extended(text)), flags)
+    pattern = re.escape(text)
+    if match_case:
+        pattern = r'(?<!\w)' + pattern + r'(?!\w)'
+    return re.compile(pattern, flags)
+
+
+class PositionMap:
+    def __init__(self, text):
+        self.astral = [match.start() for match in ASTRAL_PATTERN.finditer(text)]
+        self.document_astral = None
+
+    def to_document(self, index):
+        if not self.astral:
+            return index
+        return index + bisect_left(self.astral, index)
+
+    def to_text(self, position):
+        if not self.astral:
+            return position
+        if self.document_astral is None:
+            self.document_astral = [index + number for number, index in enumerate(self.astral)]
+        return position - bisect_left(self.document_astral, position)
+
+
+def document_length(text):
+    return len(text) + len(ASTRAL_PATTERN.findall(text))
+
+
+def plan_replacements(text, pattern, replacement, expand=False, report=None):
+    edits = []
+    parts = None
+    start = end = 0
+    count = 0
+    merge_gap = REPLACE_MERGE_GAP
+    for match in pattern.finditer(text):
+        count += 1
+        if report:
+            report(count)
+        new_text = match.expand(replacement) if expand else replacement
+        if parts is not None and match.start() - end <= merge_gap:
+            parts.append(text[end:match.start()])
+            parts.append(new_text)
+        else:
+            if parts is not None:
+                edits.append((start, end, "".join(parts)))
+                if len(edits) >= REPLACE_MAX_EDITS:
+                    merge_gap = len(text)
+                    start = edits[0][0]
+                    parts = []
+                    previous_end = start
+                    for edit_start, edit_end, edit_text in edits:
+                        parts.append(text[previous_end:edit_start])
+                        parts.append(edit_text)
+                        previous_end = edit_end
+                    parts.append(text[previous_end:match.start()])
+                    parts.append(new_text)
+                    edits = []
+                    end = match.end()
+                    continue
+            start = match.start()
+            parts = [new_text]
+        end = match.end()
+    if parts is not None:
+        edits.append((start, end, "".join(parts)))
+    return count, edits
+
+
+def edits_to_document(text, edits):
+    positions = PositionMap(text)
+    return [
+        (positions.to_document(start), positions.to_document(end), new_text)
+        for start, end, new_text in edits
+    ]
+
+
+def apply_replacements(document, edits):
+    cursor = QTextCursor(document)
+    cursor.beginEditBlock()
+    for start, end, new_text in reversed(edits):
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(new_text)
+    cursor.endEditBlock()
+
+
+THAI_PATTERN = re.compile('[\u0e01-\u0e5b]')
+LINE_BLANK = 0
+LINE_TRANSLATED = 1
+LINE_UNTRANSLATED = 2
+LINE_PENDING = 3
+PENDING_RUN_PATTERN = re.compile(b'\\x03+')
+
+
+def classify_line(line):
+    if not line.strip():
+        return LINE_BLANK
+    return LINE_TRANSLATED if THAI_PATTERN.search(line) else LINE_UNTRANSLATED
+
+
+def line_hash(line):
+    return hash(line) if line.strip() else 0
+
+
+PLACEHOLDER_PATTERN = re.compile(
+    r'%(?:\d+\$|\([^()]*\))?[-+#0]*(?:\d+|\*)?(?:\.\d+)?[sdifuxXoeEgGcp@%]'
+    r'|\{[^{}\s]*\}'
+    r'|\\[nrt"\\]'
+    r'|</?[A-Za-z][\w-]*(?:[\s=][^<>]*)?/?>'
 )
-from PySide6.QtCore import Qt, QTimer, QDateTime
-from PySide6.QtGui import QFont, QTextCursor, QTextDocument, QIcon, QAction, QTextCharFormat
-import chardet
-import pythainlp
-from pythainlp.tokenize import word_tokenize
+PLACEHOLDER_OK = 0
+PLACEHOLDER_MISMATCH = 1
+PLACEHOLDER_PENDING = 2
+PLACEHOLDER_PENDING_PATTERN = re.compile(b'\\x02+')
+
+
+def placeholder_key(line):
+    if not line.strip():
+        return 0
+    return hash(tuple(sorted(PLACEHOLDER_PATTERN.findall(line))))
+
+
+def placeholder_difference(source_line, target_line):
+    source = Counter(PLACEHOLDER_PATTERN.findall(source_line))
+    target = Counter(PLACEHOLDER_PATTERN.findall(target_line))
+    return sorted((source - target).elements()), sorted((target - source).elements())
+
+
+def translation_summary(text):
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    counts = [0, 0, 0, 0]
+    for line in lines:
+        counts[classify_line(line)] += 1
+    total = len(lines)
+    percentage = (counts[LINE_TRANSLATED] / total) * 100 if total > 0 else 0
+    return total, counts[LINE_TRANSLATED], counts[LINE_UNTRANSLATED], percentage
+
+
+def analyze_translation_file(path, cached=None):
+    try:
+        stat = os.stat(path)
+        if cached and (cached["size"], cached["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return dict(cached, cached=True)
+        digest = file_digest(path)
+        if cached and cached["sha256"] == digest:
+            return dict(cached, size=stat.st_size, mtime_ns=stat.st_mtime_ns, cached=True)
+        encoding = detect_encoding(path)
+        total, translated, untranslated, percentage = translation_summary(read_text_file(path, encoding))
+    except (OSError, UnicodeError, LookupError) as error:
+        return {"path": path, "error": str(error), "cached": False}
+    return {
+        "path": path,
+        "encoding": encoding,
+        "total": total,
+        "translated": translated,
+        "untranslated": untranslated,
+        "percentage": round(percentage, 2),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest,
+        "cached": False,
+    }
+
+
+def find_batch_files(paths, pattern):
+    for path in paths:
+        if os.path.isfile(path):
+            yield os.path.abspath(path)
+            continue
+        for directory, subdirectories, filenames in os.walk(path):
+            subdirectories.sort()
+            for filename in sorted(fnmatch.filter(filenames, pattern)):
+                yield os.path.abspath(os.path.join(directory, filename))
+
+
+def load_batch_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as file:
+            cache = json.loads(file.read().decode('utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != BATCH_CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def write_batch_report(stream, results, output_format):
+    analyzed = [result for result in results if "error" not in result]
+    total = sum(result["total"] for result in analyzed)
+    translated = sum(result["translated"] for result in analyzed)
+    aggregate = {
+        "files": len(results),
+        "errors": len(results) - len(analyzed),
+        "total": total,
+        "translated": translated,
+        "untranslated": sum(result["untranslated"] for result in analyzed),
+        "percentage": round((translated / total) * 100 if total > 0 else 0, 2),
+    }
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=BATCH_FIELDS, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(results)
+        writer.writerow(dict(aggregate, path="TOTAL"))
+    else:
+        report = {
+            "files": [{field: result[field] for field in BATCH_FIELDS if field in result} for result in results],
+            "aggregate": aggregate,
+        }
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+        stream.write("\n")
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog="Text Editor.py --batch", description="Report translation progress for text files."
+    )
+    parser.add_argument("--batch", nargs="+", required=True, metavar="PATH", help="files or directories to scan")
+    parser.add_argument("--pattern", default="*.txt", help="filename pattern for directories (default: *.txt)")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--cache", help="skip files unchanged since the run that wrote this cache")
+    parser.add_argument("--jobs", type=positive_int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.batch if not os.path.exists(path)]
+    for path in missing:
+        print(f"{parser.prog}: no such file or directory: {path}", file=sys.stderr)
+    cache = load_batch_cache(args.cache) if args.cache else {}
+    paths = list(dict.fromkeys(find_batch_files(args.batch, args.pattern)))
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(analyze_translation_file, path, cache.get(path)): path for path in paths}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    results = [results[path] for path in paths]
+
+    if args.cache:
+        files = {result["path"]: result for result in results if "error" not in result}
+        for result in files.values():
+            result.pop("cached", None)
+        data = json.dumps({"version": BATCH_CACHE_VERSION, "files": files}, ensure_ascii=False)
+        write_file_atomic(args.cache, data.encode('utf-8'))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as stream:
+            write_batch_report(stream, results, args.format)
+    else:
+        write_batch_report(sys.stdout, results, args.format)
+    return 1 if missing or any("error" in result for result in results) else 0
+
+
+class BlockIndex:
+    def __init__(self):
+        self.chunks = []
+        self.offsets = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for chunk, offset in zip(self.chunks, self.offsets):
+            for block_number in chunk:
+                yield block_number + offset
+
+    def start(self, index):
+        return self.chunks[index][0] + self.offsets[index]
+
+    def chunks_before(self, block_number, inclusive):
+        low, high = 0, len(self.chunks)
+        while low < high:
+            middle = (low + high) // 2
+            start = self.start(middle)
+            if start < block_number or inclusive and start == block_number:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def splice(self, first, old_span, new_span, marked):
+        end = first + old_span
+        delta = new_span - old_span
+        low = max(0, self.chunks_before(first, True) - 1)
+        high = max(low + 1, self.chunks_before(end, False))
+        if high < len(self.chunks) and len(self.chunks[high]) < BLOCK_INDEX_CHUNK // 2:
+            high += 1
+        values = [
+            block_number + offset
+            for chunk, offset in zip(self.chunks[low:high], self.offsets[low:high]) for block_number in chunk
+        ]
+        self.count -= len(values)
+        left, right = bisect_left(values, first), bisect_left(values, end)
+        values[left:] = marked + [block_number + delta for block_number in values[right:]]
+        self.count += len(values)
+        count = -(-len(values) // BLOCK_INDEX_CHUNK)
+        size = -(-len(values) // count) if count else 1
+        chunks = [array('q', values[start:start + size]) for start in range(0, len(values), size)]
+        self.chunks[low:high] = chunks
+        self.offsets[low:high] = [0] * len(chunks)
+        if delta:
+            for index in range(low + len(chunks), len(self.offsets)):
+                self.offsets[index] += delta
+
+    def next(self, block_number, forward=True):
+        if not self.count:
+            return None
+        if forward:
+            index = self.chunks_before(block_number, True) - 1
+            if index >= 0:
+                chunk, offset = self.chunks[index], self.offsets[index]
+                position = bisect_right(chunk, block_number - offset)
+                if position < len(chunk):
+                    return chunk[position] + offset
+            index += 1
+            return self.start(index if index < len(self.chunks) else 0)
+        index = self.chunks_before(block_number, False) - 1
+        if index < 0:
+            return self.chunks[-1][-1] + self.offsets[-1]
+        chunk, offset = self.chunks[index], self.offsets[index]
+        return chunk[bisect_left(chunk, block_number - offset) - 1] + offset
+
+
+class BlockAnalyzer(QObject):
+    changed = Signal()
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.block_count = 0
+        self.pending_timer = QTimer(self)
+        self.pending_timer.setInterval(0)
+        self.pending_timer.timeout.connect(self.process_pending)
+        document.contentsChange.connect(self.on_contents_change)
+        self.rebuild()
+
+    def rebuild(self):
+        self.reset()
+        self.block_count = self.document.blockCount()
+        self.splice(0, 0, self.block_count)
+        self.changed.emit()
+
+    def on_contents_change(self, position, chars_removed, chars_added):
+        with latency_profiler.measure("progress_update"):
+            self.update_blocks(position, chars_added)
+
+    def update_blocks(self, position, chars_added):
+        new_count = self.document.blockCount()
+        first = self.document.findBlock(position).blockNumber()
+        last = self.document.findBlock(position + chars_added).blockNumber()
+        if first < 0:
+            self.rebuild()
+            return
+        if last < first:
+            last = new_count - 1
+        new_span = last - first + 1
+        old_span = new_span - (new_count - self.block_count)
+        if old_span < 1 or first + old_span > self.block_count:
+            self.rebuild()
+            return
+        self.block_count = new_count
+        self.splice(first, old_span, new_span)
+        self.changed.emit()
+
+    def block_texts(self, first, count):
+        if count > BLOCK_TEXT_BATCH:
+            first_block = self.document.findBlockByNumber(first)
+            last_block = self.document.findBlockByNumber(first + count - 1)
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(first_block.position())
+            cursor.setPosition(last_block.position() + last_block.length() - 1, QTextCursor.KeepAnchor)
+            return cursor.selectedText().split('\u2029')
+        texts = []
+        block = self.document.findBlockByNumber(first)
+        for _ in range(count):
+            texts.append(block.text())
+            block = block.next()
+        return texts
+
+    def reset(self):
+        pass
+
+    def splice(self, first, old_span, new_span):
+        pass
+
+    def process_pending(self):
+        self.pending_timer.stop()
+
+
+class LineHashes(BlockAnalyzer):
+    lines_changed = Signal(int)
+
+    def __init__(self, document, parent=None, function=line_hash):
+        self.function = function
+        super().__init__(document, parent)
+
+    def reset(self):
+        self.hashes = array('q')
+
+    def splice(self, first, old_span, new_span):
+        self.hashes[first:first + old_span] = array('q', map(self.function, self.block_texts(first, new_span)))
+        self.lines_changed.emit(first)
+
+
+class TranslationProgress(BlockAnalyzer):
+    def __init__(self, document, parent=None):
+        self.source = array('q')
+        self.source_length = 0
+        super().__init__(document, parent)
+
+    def reset(self):
+        self.states = bytearray()
+        self.line_states = bytearray()
+        self.hashes = array('q')
+        self.counts = [0, 0, 0, 0]
+        self.untranslated = BlockIndex()
+        self.align_from = None
+        self.align_to = 0
+
+    def splice(self, first, old_span, new_span):
+        if new_span > PROGRESS_EAGER_BLOCKS:
+            self.store_lines(first, old_span, bytearray([LINE_PENDING]) * new_span, array('q', bytes(8 * new_span)))
+            self.pending_timer.start()
+        else:
+            self.store_lines(first, old_span, *self.classify_blocks(first, new_span))
+
+    def classify_blocks(self, first, count):
+        texts = self.block_texts(first, count)
+        return bytearray(map(classify_line, texts)), array('q', map(line_hash, texts))
+
+    def store_lines(self, first, old_span, line_states, hashes):
+        self.line_states[first:first + old_span] = line_states
+        self.hashes[first:first + old_span] = hashes
+        end = first + len(line_states)
+        self.store_states(first, old_span, self.aligned_states(first, end))
+        delta = len(line_states) - old_span
+        if delta and end < len(self.source) + max(delta, 0):
+            self.schedule_align(end, len(self.source) + max(delta, 0))
+
+    def aligned_states(self, first, last):
+        source = self.source
+        aligned = min(last, len(source))
+        states = bytearray(
+            state if state == LINE_BLANK or state == LINE_PENDING or not expected
+            else LINE_UNTRANSLATED if target == expected else LINE_TRANSLATED
+            for state, target, expected in zip(
+                self.line_states[first:aligned], self.hashes[first:aligned], source[first:aligned]
+            )
+        )
+        states += self.line_states[max(first, aligned):last]
+        return states
+
+    def align(self, source, first=0):
+        last = max(len(source), self.source_length)
+        self.source = source
+        self.source_length = len(source)
+        self.schedule_align(first, last)
+
+    def schedule_align(self, first, last):
+        if self.align_from is None:
+            self.align_from, self.align_to = first, last
+        else:
+            self.align_from, self.align_to = min(self.align_from, first), max(self.align_to, last)
+        self.pending_timer.start()
+
+    def align_pending(self, max_blocks):
+        if self.align_from is None:
+            return False
+        last = min(self.align_to, len(self.line_states))
+        end = min(last, self.align_from + max_blocks)
+        if self.align_from < end:
+            self.store_states(self.align_from, end - self.align_from, self.aligned_states(self.align_from, end))
+        self.align_from = end if end < last else None
+        return True
+
+    def store_states(self, first, old_span, added):
+        self.update_counts(self.states[first:first + old_span], added)
+        self.states[first:first + old_span] = added
+        marked = list(compress(range(first, first + len(added)), map(LINE_UNTRANSLATED.__eq__, added)))
+        self.untranslated.splice(first, old_span, len(added), marked)
+
+    def update_counts(self, removed, added):
+        for state in (LINE_BLANK, LINE_TRANSLATED, LINE_UNTRANSLATED, LINE_PENDING):
+            self.counts[state] += added.count(state) - removed.count(state)
+
+    def classify_pending(self, max_blocks):
+        match = PENDING_RUN_PATTERN.search(self.line_states)
+        if match is None:
+            return False
+        first = match.start()
+        count = min(match.end() - first, max_blocks)
+        self.store_lines(first, count, *self.classify_blocks(first, count))
+        return True
+
+    def process_pending(self):
+        elapsed = QElapsedTimer()
+        elapsed.start()
+        with latency_profiler.measure("progress_batch"):
+            while elapsed.elapsed() < PROGRESS_BATCH_MS:
+                if not self.classify_pending(PROGRESS_BATCH_BLOCKS) and not self.align_pending(PROGRESS_BATCH_BLOCKS):
+                    self.pending_timer.stop()
+                    break
+        self.changed.emit()
+
+    def finish_pending(self):
+        with latency_profiler.measure("progress_finish"):
+            while self.classify_pending(len(self.states)):
+                pass
+            while self.align_pending(len(self.states)):
+                pass
+        self.pending_timer.stop()
+
+    def is_pending(self):
+        return self.counts[LINE_PENDING] > 0 or self.align_from is not None
+
+    def untranslated_blocks(self):
+        return self.untranslated
+
+    def next_untranslated(self, block_number, forward=True):
+        return self.untranslated.next(block_number, forward)
+
+    def summary(self):
+        total = len(self.states)
+        if total and self.document.lastBlock().text() == "":
+            total -= 1
+        translated = self.counts[LINE_TRANSLATED]
+        untranslated = self.counts[LINE_UNTRANSLATED]
+        percentage = (translated / total) * 100 if total > 0 else 0
+        return total, translated, untranslated, percentage
+
+
+class PlaceholderChecker(BlockAnalyzer):
+    def __init__(self, document, parent=None):
+        self.source = array('q')
+        self.source_length = 0
+        super().__init__(document, parent)
+
+    def reset(self):
+        self.keys = array('q')
+        self.states = bytearray()
+        self.counts = [0, 0, 0]
+        self.problems = BlockIndex()
+        self.check_from = None
+        self.check_to = 0
+
+    def splice(self, first, old_span, new_span):
+        if new_span > PROGRESS_EAGER_BLOCKS:
+            self.store_keys(first, old_span, array('q', bytes(8 * new_span)), bytearray([PLACEHOLDER_PENDING]) * new_span)
+            self.pending_timer.start()
+        else:
+            keys = array('q', map(placeholder_key, self.block_texts(first, new_span)))
+            self.store_keys(first, old_span, keys, bytearray(new_span))
+
+    def store_keys(self, first, old_span, keys, states):
+        self.keys[first:first + old_span] = keys
+        end = first + len(keys)
+        self.store_states(first, old_span, self.checked_states(first, end, states))
+        delta = len(keys) - old_span
+        if delta and end < len(self.source) + max(delta, 0):
+            self.schedule_check(end, len(self.source) + max(delta, 0))
+
+    def checked_states(self, first, last, states):
+        checked = bytearray(
+            PLACEHOLDER_PENDING if state == PLACEHOLDER_PENDING
+            else PLACEHOLDER_MISMATCH if target and expected and target != expected else PLACEHOLDER_OK
+            for state, target, expected in zip(states, self.keys[first:last], self.source[first:last])
+        )
+        checked += states[len(checked):].replace(bytes([PLACEHOLDER_MISMATCH]), bytes([PLACEHOLDER_OK]))
+        return checked
+
+    def align(self, source, first=0):
+        last = max(len(source), self.source_length)
+        self.source = source
+        self.source_length = len(source)
+        self.schedule_check(first, last)
+
+    def schedule_check(self, first, last):
+        if self.check_from is None:
+            self.check_from, self.check_to = first, last
+        else:
+            self.check_from, self.check_to = min(self.check_from, first), max(self.check_to, last)
+        self.pending_timer.start()
+
+    def check_pending(self, max_blocks):
+        if self.check_from is None:
+            return False
+        last = min(self.check_to, len(self.states))
+        end = min(last, self.check_from + max_blocks)
+        if self.check_from < end:
+            states = self.checked_states(self.check_from, end, self.states[self.check_from:end])
+            self.store_states(self.check_from, end - self.check_from, states)
+        self.check_from = end if end < last else None
+        return True
+
+    def store_states(self, first, old_span, added):
+        for state in (PLACEHOLDER_MISMATCH, PLACEHOLDER_PENDING):
+            self.counts[state] += added.count(state) - self.states.count(state, first, first + old_span)
+        self.states[first:first + old_span] = added
+        marked = list(compress(range(first, first + len(added)), map(PLACEHOLDER_MISMATCH.__eq__, added)))
+        self.problems.splice(first, old_span, len(added), marked)
+
+    def extract_pending(self, max_blocks):
+        match = PLACEHOLDER_PENDING_PATTERN.search(self.states)
+        if match is None:
+            return False
+        first = match.start()
+        count = min(match.end() - first, max_blocks)
+        keys = array('q', map(placeholder_key, self.block_texts(first, count)))
+        self.store_keys(first, count, keys, bytearray(count))
+        return True
+
+    def process_pending(self):
+        elapsed = QElapsedTimer()
+        elapsed.start()
+        with latency_profiler.measure("placeholder_batch"):
+            while elapsed.elapsed() < PROGRESS_BATCH_MS:
+                if not self.extract_pending(PROGRESS_BATCH_BLOCKS) and not self.check_pending(PROGRESS_BATCH_BLOCKS):
+                    self.pending_timer.stop()
+                    break
+        self.changed.emit()
+
+    def finish_pending(self):
+        while self.extract_pending(len(self.states)):
+            pass
+        while self.check_pending(len(self.states)):
+            pass
+        self.pending_timer.stop()
+
+    def is_pending(self):
+        return self.counts[PLACEHOLDER_PENDING] > 0 or self.check_from is not None
+
+    def problem_blocks(self):
+        return self.problems
+
+    def next_problem(self, block_number, forward=True):
+        return self.problems.next(block_number, forward)
+
+
+class LineMarkStrip(QWidget):
+    def __init__(self, tab, analyzer, state, color, tooltip, next_mark):
+        super().__init__(tab)
+        self.tab = tab
+        self.analyzer = analyzer
+        self.state = state
+        self.color = QColor(color)
+        self.next_mark = next_mark
+        self.setFixedWidth(MARK_STRIP_WIDTH)
+        self.setCursor(Qt.PointingHandCursor)
+        self.setToolTip(tooltip)
+        analyzer.changed.connect(self.update)
+
+    def row_blocks(self, row, total):
+        first = row * total // self.height()
+        return first, max((row + 1) * total // self.height(), first + 1)
+
+    def paintEvent(self, event):
+        states = self.analyzer.states
+        total = len(states)
+        if not total or not self.analyzer.counts[self.state] or self.height() <= 0:
+            return
+        painter = QPainter(self)
+        run_start = None
+        for row in range(event.rect().top(), event.rect().bottom() + 2):
+            if row <= event.rect().bottom() and states.find(self.state, *self.row_blocks(row, total)) != -1:
+                if run_start is None:
+                    run_start = row
+            elif run_start is not None:
+                painter.fillRect(0, run_start, self.width(), row - run_start, self.color)
+                run_start = None
+
+    def mousePressEvent(self, event):
+        total = len(self.analyzer.states)
+        if not total or self.height() <= 0:
+            return
+        first = self.row_blocks(int(event.position().y()), total)[0]
+        block_number = self.next_mark(first - 1)
+        if block_number is not None:
+            self.tab.goto_block(block_number)
+
+
+def find_match_offsets(text, pattern):
+    astral = PositionMap(text).astral
+    starts = array('q')
+    ends = array('q')
+    if not astral:
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            starts.append(start)
+            ends.append(end)
+        return starts, ends
+
+    skipped = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        while skipped < len(astral) and astral[skipped] < start:
+            skipped += 1
+        starts.append(start + skipped)
+        inside = skipped
+        while inside < len(astral) and astral[inside] < end:
+            inside += 1
+        ends.append(end + inside)
+    return starts, ends
+
+
+class MatchHighlighter(QObject):
+    updated = Signal()
+
+    def __init__(self, text_area, tab):
+        super().__init__(tab)
+        self.text_area = text_area
+        self.tab = tab
+        self.pattern = None
+        self.isolated = False
+        self.regex_worker = None
+        self.visible = False
+        self.starts = array('q')
+        self.ends = array('q')
+        self.task = None
+        self.task_revision = None
+        self.task_started = None
+        self.stale = False
+
+        self.highlight_format = QTextCharFormat()
+        self.highlight_format.setBackground(QColor("#FFE066"))
+
+        self.rebuild_timer = QTimer(self)
+        self.rebuild_timer.setSingleShot(True)
+        self.rebuild_timer.timeout.connect(self.rebuild)
+        self.paint_timer = QTimer(self)
+        self.paint_timer.setSingleShot(True)
+        self.paint_timer.timeout.connect(self.refresh_visible)
+
+        text_area.verticalScrollBar().valueChanged.connect(self.schedule_paint)
+        text_area.horizontalScrollBar().valueChanged.connect(self.schedule_paint)
+        text_area.viewport().installEventFilter(self)
+        text_area.document().contentsChange.connect(self.on_contents_change)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Resize:
+            self.schedule_paint()
+        return False
+
+    def set_pattern(self, pattern, visible, isolated=False):
+        self.visible = visible
+        if pattern is None or pattern != self.pattern or isolated != self.isolated:
+            if self.regex_worker is not None and self.task is self.regex_worker:
+                self.regex_worker.cancel()
+                self.task = None
+            if pattern is None and self.regex_worker is not None:
+                self.regex_worker.shutdown()
+            self.pattern = pattern
+            self.isolated = isolated
+            self.starts = array('q')
+            self.ends = array('q')
+            if pattern is not None:
+                self.rebuild()
+            self.updated.emit()
+        self.schedule_paint()
+
+    def on_contents_change(self, position, chars_removed, chars_added):
+        if self.pattern is not None:
+            self.rebuild_timer.start(HIGHLIGHT_REBUILD_MS)
+
+    def rebuild(self):
+        if self.pattern is None:
+            return
+        if self.task is not None:
+            self.stale = True
+            return
+        document = self.text_area.document()
+        self.task_revision = document.revision()
+        self.task_started = time.perf_counter()
+        if self.isolated:
+            if self.regex_worker is None:
+                self.regex_worker = RegexSearchWorker(self)
+                self.regex_worker.finished.connect(self.on_index_built)
+                self.regex_worker.failed.connect(self.on_index_failed)
+                self.regex_worker.timed_out.connect(lambda: self.on_index_failed(None))
+            self.task = self.regex_worker
+            self.regex_worker.start_job(
+                (id(document), self.task_revision), document.toPlainText, "index", self.pattern
+            )
+            return
+        self.task = BackgroundTask(find_match_offsets, document.toPlainText(), self.pattern)
+        self.task.signals.finished.connect(self.on_index_built)
+        self.task.signals.failed.connect(self.on_index_failed)
+        QThreadPool.globalInstance().start(self.task)
+
+    def on_index_built(self, offsets):
+        self.task = None
+        latency_profiler.record("highlight_index", self.task_started)
+        if self.stale or self.task_revision != self.text_area.document().revision():
+            self.stale = False
+            self.rebuild()
+            return
+        self.starts, self.ends = offsets
+        self.schedule_paint()
+        self.updated.emit()
+
+    def on_index_failed(self, error):
+        self.task = None
+        self.stale = False
+
+    def match_count(self):
+        return len(self.starts)
+
+    def match_number(self, position):
+        index = bisect_left(self.starts, position)
+        if index < len(self.starts) and self.starts[index] == position:
+            return index + 1
+        return None
+
+    def schedule_paint(self):
+        if not self.paint_timer.isActive():
+            self.paint_timer.start(0)
+
+    def visible_range(self):
+        viewport = self.text_area.viewport()
+        top = self.text_area.cursorForPosition(QPoint(0, 0)).block().position()
+        bottom_block = self.text_area.cursorForPosition(QPoint(0, viewport.height())).block()
+        return top, bottom_block.position() + bottom_block.length()
+
+    def refresh_visible(self):
+        selections = []
+        if self.visible and self.starts:
+            top, bottom = self.visible_range()
+            if top > bottom:
+                top = 0
+                self.paint_timer.start(100)
+            last = bisect_left(self.starts, bottom)
+            first = max(bisect_right(self.ends, top), last - HIGHLIGHT_MAX_VISIBLE)
+            document = self.text_area.document()
+            for index in range(first, last):
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = QTextCursor(document)
+                selection.cursor.setPosition(self.starts[index])
+                selection.cursor.setPosition(self.ends[index], QTextCursor.KeepAnchor)
+                selection.format = self.highlight_format
+                selections.append(selection)
+        self.tab.set_selection_layer("matches", selections)
+
+
+def iter_line_matches(text, pattern):
+    line_number = 0
+    line_start = 0
+    scanned = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        newlines = text.count('\n', scanned, start)
+        if newlines:
+            line_number += newlines
+            line_start = text.rfind('\n', scanned, start) + 1
+        scanned = start
+        line_end = text.find('\n', start)
+        if line_end == -1:
+            line_end = len(text)
+        yield line_number, start - line_start, end - start, text[line_start:line_end]
+
+
+class SearchSignals(QObject):
+    found = Signal(object, object)
+    finished = Signal(object, int)
+
+
+class SearchTask(QRunnable):
+    def __init__(self, key, snapshot, pattern, cancelled):
+        super().__init__()
+        self.key = key
+        self.snapshot = snapshot
+        self.pattern = pattern
+        self.cancelled = cancelled
+        self.signals = SearchSignals()
+
+    def run(self):
+        count = 0
+        batch = []
+        try:
+            try:
+                text = self.snapshot() if callable(self.snapshot) else self.snapshot
+                for line_number, column, length, line_text in iter_line_matches(text, self.pattern):
+                    if self.cancelled.is_set():
+                        return
+                    batch.append((line_number, column, length, line_text[:SEARCH_PREVIEW_CHARS]))
+                    count += 1
+                    if len(batch) >= SEARCH_BATCH_SIZE:
+                        self.signals.found.emit(self.key, batch)
+                        batch = []
+                    if count >= SEARCH_MAX_RESULTS:
+                        break
+            except (ValueError, OSError):
+                batch = []
+            if batch and not self.cancelled.is_set():
+                self.signals.found.emit(self.key, batch)
+            self.signals.finished.emit(self.key, count)
+        except RuntimeError:
+            pass
+
+
+class SearchResultsDock(QDockWidget):
+    def __init__(self, parent):
+        super().__init__("ผลการค้นหา", parent)
+        self.app = parent
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.itemActivated.connect(self.open_result)
+        self.tree.itemClicked.connect(self.open_result)
+        self.setWidget(self.tree)
+        self.groups = {}
+        self.counts = {}
+        self.tasks = {}
+        self.cancelled = threading.Event()
+        self.started = None
+
+    def start(self, pattern, sources):
+        self.started = time.perf_counter()
+        self.cancelled.set()
+        self.cancelled = threading.Event()
+        self.tree.clear()
+        self.groups = {}
+        self.counts = {}
+        self.tasks = {}
+        self.setWindowTitle("ผลการค้นหา: กำลังค้นหา...")
+        for key, snapshot in sources:
+            self.group_item(key).setHidden(True)
+            task = SearchTask(key, snapshot, pattern, self.cancelled)
+            task.signals.found.connect(self.add_results)
+            task.signals.finished.connect(self.finish_group)
+            self.tasks[key] = task
+            QThreadPool.globalInstance().start(task)
+        if not self.tasks:
+            self.setWindowTitle("ผลการค้นหา")
+        self.show()
+
+    def group_item(self, key):
+        item = self.groups.get(key)
+        if item is None:
+            tab, pane = key
+            index = self.app.tabs.indexOf(tab)
+            tab_name = self.app.tabs.tabText(index) if index != -1 else "?"
+            pane_name = "ต้นฉบับ" if pane == "source" else "แปล"
+            item = QTreeWidgetItem([f"{tab_name} ({pane_name})"])
+            item.setData(0, Qt.UserRole + 1, f"{tab_name} ({pane_name})")
+            self.tree.addTopLevelItem(item)
+            self.groups[key] = item
+            self.counts[key] = 0
+        return item
+
+    def add_results(self, key, batch):
+        if key not in self.tasks:
+            return
+        group = self.group_item(key)
+        group.setHidden(False)
+        items = []
+        for line_number, column, length, preview in batch:
+            child = QTreeWidgetItem([f"บรรทัด {line_number + 1}: {preview.strip()}"])
+            child.setData(0, Qt.UserRole, (key, line_number, column, length))
+            items.append(child)
+        group.addChildren(items)
+        group.setExpanded(True)
+        self.counts[key] += len(batch)
+        group.setText(0, f"{group.data(0, Qt.UserRole + 1)} - {self.counts[key]:,}")
+
+    def finish_group(self, key, count):
+        if self.tasks.pop(key, None) is None:
+            return
+        if count >= SEARCH_MAX_RESULTS:
+            self.group_item(key).setText(
+                0, f"{self.groups[key].data(0, Qt.UserRole + 1)} - {SEARCH_MAX_RESULTS:,}+"
+            )
+        if not self.tasks:
+            latency_profiler.record("find_in_all_tabs", self.started)
+            total = sum(self.counts.values())
+            self.setWindowTitle(f"ผลการค้นหา: {total:,} รายการ")
+
+    def open_result(self, item):
+        result = item.data(0, Qt.UserRole)
+        if result:
+            (tab, pane), line_number, column, length = result
+            self.app.show_search_result(tab, pane, line_number, column, length)
+
+
+class DiagnosticsDock(QDockWidget):
+    def __init__(self, parent):
+        super().__init__("วินิจฉัยประสิทธิภาพ", parent)
+        self.enable_checkbox = QCheckBox("เก็บข้อมูลเวลา")
+        self.enable_checkbox.setChecked(latency_profiler.enabled)
+        self.enable_checkbox.toggled.connect(self.set_recording)
+        self.status_label = QLabel()
+        export_button = QPushButton("ส่งออก JSON...")
+        export_button.clicked.connect(self.export)
+        clear_button = QPushButton("ล้างข้อมูล")
+        clear_button.clicked.connect(self.clear)
+
+        limits = "/".join(str(limit) for limit in PROFILER_BUCKETS_MS)
+        self.summary_tree = QTreeWidget()
+        self.summary_tree.setHeaderLabels(
+            ["การทำงาน", "ครั้ง", "เฉลี่ย ms", "p50 ms", "p95 ms", "สูงสุด ms", f"การกระจาย ({limits} ms)"]
+        )
+        self.summary_tree.setRootIsDecorated(False)
+        self.slow_tree = QTreeWidget()
+        self.slow_tree.setHeaderLabels(["เวลา", "การทำงาน", "ms", "รายละเอียด", "เธรด"])
+        self.slow_tree.setRootIsDecorated(False)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.enable_checkbox)
+        controls.addWidget(self.status_label, 1)
+        controls.addWidget(export_button)
+        controls.addWidget(clear_button)
+        trees = QHBoxLayout()
+        trees.addWidget(self.summary_tree, 3)
+        trees.addWidget(self.slow_tree, 2)
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addLayout(trees)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(PROFILER_REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def set_recording(self, enabled):
+        latency_profiler.enabled = enabled
+        self.refresh()
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+
+    def refresh(self):
+        events = latency_profiler.snapshot()
+        state = "กำลังเก็บข้อมูล" if latency_profiler.enabled else "ปิดอยู่"
+        self.status_label.setText(f"{state} - {len(events):,}/{latency_profiler.capacity:,} รายการ")
+
+        self.summary_tree.clear()
+        items = []
+        for name, stats in latency_profiler.summary(events).items():
+            peak = max(stats["histogram"])
+            bars = "".join(" ▁▂▃▄▅▆▇█"[(count * 8 + peak - 1) // peak] for count in stats["histogram"])
+            item = QTreeWidgetItem([
+                name, f"{stats['count']:,}", f"{stats['mean_ms']:.2f}", f"{stats['p50_ms']:.2f}",
+                f"{stats['p95_ms']:.2f}", f"{stats['max_ms']:.2f}", bars,
+            ])
+            item.setToolTip(6, "  ".join(
+                f"{bucket}: {count:,}" for bucket, count in zip(self.bucket_names(), stats["histogram"])
+            ))
+            items.append(item)
+        self.summary_tree.addTopLevelItems(items)
+
+        self.slow_tree.clear()
+        items = []
+        for name, ms, stamp, detail, thread in reversed(latency_profiler.slow_events(events)[-PROFILER_SLOW_SHOWN:]):
+            when = QDateTime.fromMSecsSinceEpoch(int(stamp * 1000)).toString("HH:mm:ss.zzz")
+            items.append(QTreeWidgetItem([when, name, f"{ms:.1f}", detail, thread]))
+        self.slow_tree.addTopLevelItems(items)
+
+    def bucket_names(self):
+        return [f"<{limit} ms" for limit in PROFILER_BUCKETS_MS] + [f">={PROFILER_BUCKETS_MS[-1]} ms"]
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "ส่งออกข้อมูลเวลา", "latency.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            latency_profiler.export(path)
+        except OSError as error:
+            QMessageBox.critical(self, "ส่งออกข้อมูลเวลา", f"Could not export: {error}")
+
+    def clear(self):
+        latency_profiler.clear()
+        self.refresh()
+
+
+class TranslationMemoryDock(QDockWidget):
+    def __init__(self, parent):
+        super().__init__("หน่วยความจำการแปล", parent)
+        self.app = parent
+        self.query_label = QLabel()
+        self.query_label.setWordWrap(True)
+        self.status_label = QLabel()
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["%", "ต้นฉบับ", "คำแปล"])
+        self.tree.setRootIsDecorated(False)
+        self.tree.setToolTip("ดับเบิลคลิกเพื่อใช้คำแปลนี้กับบรรทัดปัจจุบัน")
+        self.tree.itemActivated.connect(self.apply)
+        import_button = QPushButton("นำเข้าจากโปรเจกต์...")
+        import_button.clicked.connect(self.app.import_project_memory)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.query_label)
+        layout.addWidget(self.tree)
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.status_label, 1)
+        bottom_layout.addWidget(import_button)
+        layout.addLayout(bottom_layout)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.app.update_memory_suggestions()
+
+    def show_suggestions(self, text, suggestions, elapsed_ms):
+        self.query_label.setText(text.strip())
+        self.tree.clear()
+        items = []
+        for score, source, target in suggestions:
+            item = QTreeWidgetItem([f"{score * 100:.0f}", source, target])
+            item.setData(0, Qt.UserRole, target)
+            items.append(item)
+        self.tree.addTopLevelItems(items)
+        self.status_label.setText(f"พบ {len(suggestions)} รายการ ({elapsed_ms:.1f} ms)")
+
+    def apply(self, item):
+        self.app.apply_memory_suggestion(item.data(0, Qt.UserRole))
+
+
+class PlaceholderProblemsDock(QDockWidget):
+    def __init__(self, parent):
+        super().__init__("ตรวจตัวแปรและแท็ก", parent)
+        self.app = parent
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["บรรทัด", "ขาด", "เกิน", "ต้นฉบับ", "คำแปล"])
+        self.tree.setRootIsDecorated(False)
+        self.tree.itemActivated.connect(self.open_problem)
+        self.tree.itemClicked.connect(self.open_problem)
+        self.setWidget(self.tree)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+
+    def schedule_refresh(self):
+        if self.isVisible() and not self.refresh_timer.isActive():
+            self.refresh_timer.start(PROGRESS_REFRESH_MS)
+
+    def refresh(self):
+        self.refresh_timer.stop()
+        self.tree.clear()
+        tab = self.app.tabs.currentWidget()
+        if tab is None:
+            self.setWindowTitle("ตรวจตัวแปรและแท็ก")
+            return
+        items = []
+        for block_number, missing, extra, source, target in tab.placeholder_problems():
+            item = QTreeWidgetItem([f"{block_number + 1}", " ".join(missing), " ".join(extra), source.strip(), target.strip()])
+            item.setData(0, Qt.UserRole, block_number)
+            items.append(item)
+        self.tree.addTopLevelItems(items)
+        title = f"ตรวจตัวแปรและแท็ก: {tab.placeholders.counts[PLACEHOLDER_MISMATCH]:,} บรรทัด"
+        if tab.placeholders.is_pending():
+            title += " (กำลังตรวจ...)"
+        self.setWindowTitle(title)
+
+    def open_problem(self, item):
+        tab = self.app.tabs.currentWidget()
+        if tab is not None:
+            tab.goto_block(item.data(0, Qt.UserRole))
+
+
+def write_frame(stream, message):
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    stream.write(REGEX_FRAME_MAGIC + len(data).to_bytes(8, "little") + data)
+    stream.flush()
+
+
+def read_frame(stream):
+    header = stream.read(12)
+    if len(header) < 12 or header[:4] != REGEX_FRAME_MAGIC:
+        return None
+    return pickle.loads(stream.read(int.from_bytes(header[4:], "little")))
+
+
+def parse_frames(buffer):
+    messages = []
+    while True:
+        start = buffer.find(REGEX_FRAME_MAGIC)
+        if start == -1:
+            del buffer[:max(0, len(buffer) - 3)]
+            return messages
+        if len(buffer) < start + 12:
+            del buffer[:start]
+            return messages
+        length = int.from_bytes(buffer[start + 4:start + 12], "little")
+        if len(buffer) < start + 12 + length:
+            del buffer[:start]
+            return messages
+        messages.append(pickle.loads(bytes(buffer[start + 12:start + 12 + length])))
+        del buffer[:start + 12 + length]
+
+
+def last_match_before(pattern, text, index, report):
+    last = None
+    for count, match in enumerate(pattern.finditer(text, 0, index), 1):
+        last = match
+        report(count)
+    return last
+
+
+def regex_find(text, positions, pattern, report, position, forward, wrap):
+    index = positions.to_text(position)
+    if forward:
+        match = pattern.search(text, index)
+        if match and match.start() == match.end() == index:
+            match = pattern.search(text, index + 1) if index < len(text) else None
+        if match is None and wrap:
+            match = pattern.search(text)
+    else:
+        match = last_match_before(pattern, text, index, report)
+        if match is None and wrap:
+            match = last_match_before(pattern, text, len(text), report)
+    if match is None:
+        return None
+    return positions.to_document(match.start()), positions.to_document(match.end())
+
+
+def regex_replace(text, positions, pattern, report, start, end, replacement, forward, wrap):
+    expansion = None
+    if start != end:
+        match = pattern.fullmatch(text, positions.to_text(start), positions.to_text(end))
+        if match:
+            expansion = match.expand(replacement)
+    found = regex_find(text, positions, pattern, report, end if forward else start, forward, wrap)
+    return expansion, found
+
+
+def regex_replace_all(text, positions, pattern, report, replacement):
+    count, edits = plan_replacements(text, pattern, replacement, expand=True, report=report)
+    return count, edits_to_document(text, edits)
+
+
+def regex_index(text, positions, pattern, report):
+    return find_match_offsets(text, pattern)
+
+
+REGEX_OPERATIONS = {
+    "find": regex_find,
+    "replace": regex_replace,
+    "replace_all": regex_replace_all,
+    "index": regex_index,
+}
+
+
+def run_regex_worker():
+    channel_in = sys.stdin.buffer
+    channel_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    sys.stdout = sys.stderr
+    text = ""
+    positions = PositionMap(text)
+    while True:
+        message = read_frame(channel_in)
+        if message is None:
+            return
+        if message[0] == "text":
+            text = message[1]
+            positions = PositionMap(text)
+            continue
+
+        _, job_id, operation, pattern, args = message
+        last_report = [time.monotonic()]
+
+        def report(count):
+            now = time.monotonic()
+            if now - last_report[0] >= REGEX_PROGRESS_INTERVAL:
+                last_report[0] = now
+                write_frame(channel_out, ("progress", job_id, count))
+
+        write_frame(channel_out, ("started", job_id, None))
+        try:
+            result = REGEX_OPERATIONS[operation](text, positions, pattern, report, *args)
+        except Exception as error:
+            write_frame(channel_out, ("error", job_id, str(error)))
+        else:
+            write_frame(channel_out, ("result", job_id, result))
+
+
+class RegexSearchWorker(QObject):
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+    timed_out = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.buffer = bytearray()
+        self.text_key = None
+        self.job_id = 0
+        self.active_job = None
+        self.job_started = False
+        self.match_count = 0
+        self.timeout_ms = REGEX_TIMEOUT_MS
+        self.elapsed = QElapsedTimer()
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(100)
+        self.watchdog.timeout.connect(self.check_timeout)
+
+    def ensure_process(self):
+        if self.process is not None and self.process.state() != QProcess.NotRunning:
+            return
+        self.buffer.clear()
+        self.text_key = None
+        self.process = QProcess(self)
+        self.process.setProgram(sys.executable)
+        self.process.setArguments([os.path.abspath(__file__), "--regex-worker"])
+        self.process.setProcessChannelMode(QProcess.SeparateChannels)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.finished.connect(self.on_process_finished)
+        self.process.start()
+
+    def start_job(self, text_key, text_source, operation, pattern, args=()):
+        self.cancel()
+        self.ensure_process()
+        if text_key != self.text_key:
+            self.write(("text", text_source()))
+            self.text_key = text_key
+        self.job_id += 1
+        self.active_job = self.job_id
+        self.job_started = False
+        self.match_count = 0
+        self.write(("job", self.job_id, operation, pattern, tuple(args)))
+        self.elapsed.start()
+        self.watchdog.start()
+
+    def write(self, message):
+        data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        self.process.write(REGEX_FRAME_MAGIC + len(data).to_bytes(8, "little") + data)
+
+    def read_output(self):
+        if self.process is None:
+            return
+        self.buffer += bytes(self.process.readAllStandardOutput())
+        for kind, job_id, payload in parse_frames(self.buffer):
+            if job_id != self.active_job:
+                continue
+            if kind == "started":
+                self.job_started = True
+                self.elapsed.start()
+            elif kind == "progress":
+                self.match_count = payload
+                self.progress.emit(self.match_count, self.elapsed.elapsed())
+            elif kind == "result":
+                self.stop_job()
+                self.finished.emit(payload)
+            else:
+                self.stop_job()
+                self.failed.emit(payload)
+
+    def check_timeout(self):
+        if self.active_job is None:
+            self.watchdog.stop()
+        elif self.job_started and self.elapsed.elapsed() > self.timeout_ms:
+            self.cancel()
+            self.timed_out.emit()
+        else:
+            self.progress.emit(self.match_count, self.elapsed.elapsed())
+
+    def stop_job(self):
+        self.active_job = None
+        self.watchdog.stop()
+
+    def cancel(self):
+        if self.active_job is None:
+            return
+        self.stop_job()
+        self.shutdown()
+
+    def shutdown(self):
+        process = self.process
+        self.process = None
+        self.text_key = None
+        self.buffer.clear()
+        if process is not None:
+            process.finished.disconnect(self.on_process_finished)
+            process.kill()
+            process.waitForFinished(1000)
+            process.deleteLater()
+
+    def on_process_finished(self):
+        self.process = None
+        self.text_key = None
+        if self.active_job is not None:
+            self.stop_job()
+            self.failed.emit("regex worker exited unexpectedly")
+
+
+class BackupBrowser(QDialog):
+    def __init__(self, tab, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+        self.setWindowTitle(f"กู้คืนเวอร์ชัน - {os.path.basename(tab.file2_path)}")
+        self.resize(800, 500)
+
+        self.version_list = QTreeWidget()
+        self.version_list.setHeaderLabels(["เวลา", "จำนวนตัวอักษร"])
+        self.version_list.setRootIsDecorated(False)
+        self.version_list.currentItemChanged.connect(self.show_preview)
+        self.preview = QTextEdit()
+        self.preview.setReadOnly(True)
+        self.preview.setLineWrapMode(QTextEdit.NoWrap)
+
+        for manifest in list_backups(BACKUP_FOLDER, tab.file2_path):
+            saved_at = QDateTime.fromMSecsSinceEpoch(int(manifest["time"] * 1000))
+            item = QTreeWidgetItem([saved_at.toString("yyyy-MM-dd HH:mm:ss"), f"{manifest['chars']:,}"])
+            item.setData(0, Qt.UserRole, manifest)
+            self.version_list.addTopLevelItem(item)
+
+        restore_button = QPushButton("กู้คืนเวอร์ชันนี้")
+        restore_button.clicked.connect(self.restore)
+        close_button = QPushButton("ปิด")
+        close_button.clicked.connect(self.reject)
+
+        content_layout = QHBoxLayout()
+        content_layout.addWidget(self.version_list, 1)
+        content_layout.addWidget(self.preview, 2)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(restore_button)
+        button_layout.addWidget(close_button)
+        layout = QVBoxLayout()
+        layout.addLayout(content_layout)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        if self.version_list.topLevelItemCount():
+            self.version_list.setCurrentItem(self.version_list.topLevelItem(0))
+
+    def version_count(self):
+        return self.version_list.topLevelItemCount()
+
+    def show_preview(self, item):
+        if item is None:
+            self.preview.clear()
+            return
+        try:
+            self.preview.setPlainText(load_backup(BACKUP_FOLDER, item.data(0, Qt.UserRole), BACKUP_PREVIEW_CHARS))
+        except (OSError, ValueError, zlib.error) as error:
+            self.preview.setPlainText(f"ไม่สามารถอ่านไฟล์สำรองได้: {error}")
+
+    def restore(self):
+        item = self.version_list.currentItem()
+        if item is None:
+            return
+        try:
+            text = load_backup(BACKUP_FOLDER, item.data(0, Qt.UserRole))
+        except (OSError, ValueError, zlib.error) as error:
+            QMessageBox.critical(self, "กู้คืนเวอร์ชัน", f"Could not read backup: {error}")
+            return
+        cursor = QTextCursor(self.tab.target_text_area.document())
+        cursor.beginEditBlock()
+        cursor.select(QTextCursor.Document)
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        self.accept()
+
 
 class FindReplaceDialog(QDialog):
     def __init__(self, parent=None):
@@ -37,6 +3197,25 @@ class FindReplaceDialog(QDialog):
         self.match_case_checkbox = QCheckBox("ตรงกับทั้งคำเท่านั้น")
         self.wrap_around_checkbox = QCheckBox("Wrap around")
         self.wrap_around_checkbox.setChecked(True)
+        self.highlight_checkbox = QCheckBox("ไฮไลต์ทั้งหมด")
+        self.match_label = QLabel()
+        self.watched_highlighters = set()
+
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(1, 600)
+        self.timeout_spin.setValue(REGEX_TIMEOUT_MS // 1000)
+        self.timeout_spin.setSuffix(" วินาที")
+        self.search_status = QLabel()
+        self.cancel_search_button = QPushButton("ยกเลิกการค้นหา")
+        self.cancel_search_button.clicked.connect(self.cancel_regex_search)
+        self.cancel_search_button.hide()
+        self.regex_request = None
+        self.regex_started = None
+        self.regex_worker = RegexSearchWorker(self)
+        self.regex_worker.progress.connect(self.on_regex_progress)
+        self.regex_worker.finished.connect(self.on_regex_finished)
+        self.regex_worker.failed.connect(self.on_regex_failed)
+        self.regex_worker.timed_out.connect(self.on_regex_timed_out)
 
         self.search_mode_group = QButtonGroup()
         self.normal_radio = QRadioButton("ธรรมดา")
@@ -46,6 +3225,7 @@ class FindReplaceDialog(QDialog):
         self.search_mode_group.addButton(self.normal_radio)
         self.search_mode_group.addButton(self.extended_radio)
         self.search_mode_group.addButton(self.regex_radio)
+        self.regex_radio.toggled.connect(self.prepare_regex_worker)
 
         find_button = QPushButton("ค้นหาถัดไป")
         find_button.clicked.connect(self.find)
@@ -53,6 +3233,8 @@ class FindReplaceDialog(QDialog):
         replace_button.clicked.connect(self.replace)
         replace_all_button = QPushButton("แทนที่ทั้งหมด")
         replace_all_button.clicked.connect(self.replace_all)
+        find_all_tabs_button = QPushButton("ค้นหาในทุกแท็บ")
+        find_all_tabs_button.clicked.connect(self.find_in_all_tabs)
         close_button = QPushButton("ปิด")
         close_button.clicked.connect(self.close)
 
@@ -69,21 +3251,39 @@ class FindReplaceDialog(QDialog):
 
         layout.addWidget(self.match_case_checkbox)
         layout.addWidget(self.wrap_around_checkbox)
+        layout.addWidget(self.highlight_checkbox)
 
         layout.addWidget(QLabel("โหมดการค้นหา:"))
         layout.addWidget(self.normal_radio)
         layout.addWidget(self.extended_radio)
         layout.addWidget(self.regex_radio)
 
+        timeout_layout = QHBoxLayout()
+        timeout_layout.addWidget(QLabel("เวลาสูงสุดของ Regular expression:"))
+        timeout_layout.addWidget(self.timeout_spin)
+        layout.addLayout(timeout_layout)
+
         button_layout = QHBoxLayout()
         button_layout.addWidget(find_button)
         button_layout.addWidget(replace_button)
         button_layout.addWidget(replace_all_button)
+        button_layout.addWidget(find_all_tabs_button)
         button_layout.addWidget(close_button)
         layout.addLayout(button_layout)
+        layout.addWidget(self.match_label)
+
+        status_layout = QHBoxLayout()
+        status_layout.addWidget(self.search_status)
+        status_layout.addWidget(self.cancel_search_button)
+        layout.addLayout(status_layout)
 
         self.setLayout(layout)
 
+        self.find_edit.textChanged.connect(self.update_highlight)
+        self.match_case_checkbox.toggled.connect(self.update_highlight)
+        self.highlight_checkbox.toggled.connect(self.update_highlight)
+        self.search_mode_group.buttonToggled.connect(self.update_highlight)
+
     def find(self):
         current_tab = self.parent.tabs.currentWidget()
         if current_tab is None:
@@ -104,40 +3304,87 @@ class FindReplaceDialog(QDialog):
             else:
                 cursor.movePosition(QTextCursor.End)
 
+        if self.regex_radio.isChecked():
+            position = cursor.selectionEnd() if search_forward else cursor.selectionStart()
+            self.start_regex_job("find", (position, search_forward, wrap_around), self.on_regex_find)
+            return
+
         find_flags = QTextDocument.FindFlags(0)
         if not search_forward:
             find_flags |= QTextDocument.FindBackward
 
-        if self.regex_radio.isChecked():
-            pattern = QRegularExpression(text_to_find)
-            if match_case:
-                pattern.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
-        else:
-            pattern = text_to_find
-            if match_case and self.normal_radio.isChecked():
-                find_flags |= QTextDocument.FindCaseSensitively | QTextDocument.FindWholeWords 
-            elif match_case:
-                find_flags |= QTextDocument.FindCaseSensitively
+        pattern = text_to_find
+        if match_case and self.normal_radio.isChecked():
+            find_flags |= QTextDocument.FindCaseSensitively | QTextDocument.FindWholeWords 
+        elif match_case:
+            find_flags |= QTextDocument.FindCaseSensitively
 
-        found_cursor = current_tab.target_text_area.document().find(pattern, cursor, find_flags)
+        with latency_profiler.measure("find"):
+            found_cursor = current_tab.target_text_area.document().find(pattern, cursor, find_flags)
 
-        if found_cursor.isNull() and wrap_around:
-            if search_forward:
-                found_cursor = current_tab.target_text_area.document().find(
-                    pattern, QTextCursor(current_tab.target_text_area.document()), find_flags
-                )
-            else:
-                found_cursor = current_tab.target_text_area.document().find(
-                    pattern,
-                    QTextCursor(current_tab.target_text_area.document()),
-                    find_flags | QTextDocument.FindBackward,
-                )
+            if found_cursor.isNull() and wrap_around:
+                if search_forward:
+                    found_cursor = current_tab.target_text_area.document().find(
+                        pattern, QTextCursor(current_tab.target_text_area.document()), find_flags
+                    )
+                else:
+                    found_cursor = current_tab.target_text_area.document().find(
+                        pattern,
+                        QTextCursor(current_tab.target_text_area.document()),
+                        find_flags | QTextDocument.FindBackward,
+                    )
 
         if not found_cursor.isNull():
             current_tab.target_text_area.setTextCursor(found_cursor)
+            self.update_match_label()
         else:
             QMessageBox.information(self, "Find", f"ไม่พบข้อความ '{text_to_find}'")
 
+    def find_in_all_tabs(self):
+        text_to_find = self.find_edit.text()
+        if not text_to_find:
+            return
+        try:
+            pattern = compile_search_pattern(
+                text_to_find, self.search_mode(), self.match_case_checkbox.isChecked()
+            )
+        except re.error as error:
+            QMessageBox.warning(self, "Find", f"Invalid regular expression: {error}")
+            return
+        self.parent.find_in_all_tabs(pattern)
+
+    def update_highlight(self):
+        current_tab = self.parent.tabs.currentWidget()
+        if current_tab is not None and current_tab.match_highlighter not in self.watched_highlighters:
+            self.watched_highlighters.add(current_tab.match_highlighter)
+            current_tab.match_highlighter.updated.connect(self.update_match_label)
+        self.parent.highlight_all_matches(
+            self.find_edit.text(),
+            self.search_mode(),
+            self.match_case_checkbox.isChecked(),
+            self.highlight_checkbox.isChecked(),
+        )
+        self.update_match_label()
+
+    def update_match_label(self):
+        current_tab = self.parent.tabs.currentWidget()
+        if current_tab is None or current_tab.match_highlighter.pattern is None:
+            self.match_label.clear()
+            return
+        highlighter = current_tab.match_highlighter
+        total = highlighter.match_count()
+        number = highlighter.match_number(current_tab.target_text_area.textCursor().selectionStart())
+        if number:
+            self.match_label.setText(f"รายการที่ {number:,} จาก {total:,}")
+        else:
+            self.match_label.setText(f"พบ {total:,} รายการ")
+
+    def closeEvent(self, event):
+        self.regex_worker.shutdown()
+        self.finish_regex_job()
+        self.parent.highlight_all_matches("")
+        super().closeEvent(event)
+
     def replace(self):
         current_tab = self.parent.tabs.currentWidget()
         if current_tab is None:
@@ -155,40 +3402,57 @@ class FindReplaceDialog(QDialog):
         cursor = current_tab.target_text_area.textCursor()
 
         if self.regex_radio.isChecked():
-            pattern = QRegularExpression(text_to_find)
-            if match_case:
-                pattern.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
-            find_flags = QTextDocument.FindFlags(0)
-        else:
-            pattern = text_to_find
-            find_flags = QTextDocument.FindFlags(0)
-            if not search_forward:
-                find_flags |= QTextDocument.FindBackward
-            if match_case and self.normal_radio.isChecked():
-                find_flags |= QTextDocument.FindCaseSensitively | QTextDocument.FindWholeWords 
-            elif match_case:
-                find_flags |= QTextDocument.FindCaseSensitively
-
-        if cursor.hasSelection() and (self.regex_radio.isChecked() or cursor.selectedText() == text_to_find):
-            cursor.removeSelectedText()
-            cursor.insertText(text_to_replace)
-
-        found_cursor = current_tab.target_text_area.document().find(pattern, cursor, find_flags)
-        if found_cursor.isNull() and wrap_around:
-            if search_forward:
-                found_cursor = current_tab.target_text_area.document().find(
-                    pattern, QTextCursor(current_tab.target_text_area.document()), find_flags
-                )
-            else:
-                found_cursor = current_tab.target_text_area.document().find(
-                    pattern,
-                    QTextCursor(current_tab.target_text_area.document()),
-                    find_flags | QTextDocument.FindBackward,
-                )
+            start, end = cursor.selectionStart(), cursor.selectionEnd()
+            self.start_regex_job(
+                "replace",
+                (start, end, text_to_replace, search_forward, wrap_around),
+                lambda tab, result: self.on_regex_replace(tab, start, end, result),
+            )
+            return
+
+        pattern = text_to_find
+        find_flags = QTextDocument.FindFlags(0)
+        if not search_forward:
+            find_flags |= QTextDocument.FindBackward
+        if match_case and self.normal_radio.isChecked():
+            find_flags |= QTextDocument.FindCaseSensitively | QTextDocument.FindWholeWords 
+        elif match_case:
+            find_flags |= QTextDocument.FindCaseSensitively
+
+        with latency_profiler.measure("replace"):
+            if cursor.hasSelection() and cursor.selectedText() == text_to_find:
+                cursor.removeSelectedText()
+                cursor.insertText(text_to_replace)
+
+            found_cursor = current_tab.target_text_area.document().find(pattern, cursor, find_flags)
+            if found_cursor.isNull() and wrap_around:
+                if search_forward:
+                    found_cursor = current_tab.target_text_area.document().find(
+                        pattern, QTextCursor(current_tab.target_text_area.document()), find_flags
+                    )
+                else:
+                    found_cursor = current_tab.target_text_area.document().find(
+                        pattern,
+                        QTextCursor(current_tab.target_text_area.document()),
+                        find_flags | QTextDocument.FindBackward,
+                    )
 
         if not found_cursor.isNull():
             current_tab.target_text_area.setTextCursor(found_cursor)
 
+    def search_mode(self):
+        if self.regex_radio.isChecked():
+            return "regex"
+        if self.extended_radio.isChecked():
+            return "extended"
+        return "normal"
+
+    def replacement_text(self):
+        text_to_replace = self.replace_edit.text()
+        if self.search_mode() == "extended":
+            return expand_extended(text_to_replace)
+        return text_to_replace
+
     def replace_all(self):
         current_tab = self.parent.tabs.currentWidget()
         if current_tab is None:
@@ -199,41 +3463,25 @@ class FindReplaceDialog(QDialog):
         if not text_to_find:
             return
 
-        match_case = self.match_case_checkbox.isChecked()
-        document = current_tab.target_text_area.document()
-        cursor = QTextCursor(document)
-
-        if self.regex_radio.isChecked():
-            pattern = QRegularExpression(text_to_find)
-            if match_case:
-                pattern.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
-        else:
-            if match_case and self.normal_radio.isChecked():
-                pattern = text_to_find
-                find_flags = QTextDocument.FindFlags(QTextDocument.FindWholeWords) | QTextDocument.FindCaseSensitively
-            elif match_case:
-                pattern = text_to_find
-                find_flags = QTextDocument.FindFlags(QTextDocument.FindCaseSensitively)
-            else:
-                pattern = text_to_find.lower()
-                find_flags = QTextDocument.FindFlags(0)
+        if self.search_mode() == "regex":
+            self.start_regex_job(
+                "replace_all",
+                (text_to_replace,),
+                lambda tab, result: self.on_regex_replace_all(tab, text_to_find, text_to_replace, result),
+            )
+            return
 
-        replacements = 0
-        cursor.beginEditBlock()
-        while True:
-            if self.regex_radio.isChecked():
-                found_cursor = document.find(pattern, cursor)
-            else:
-                found_cursor = document.find(pattern, cursor, find_flags)
-            if found_cursor.isNull():
-                break
-            found_cursor.removeSelectedText()
-            found_cursor.insertText(text_to_replace)
-            replacements += 1
-            cursor = found_cursor
+        pattern = compile_search_pattern(text_to_find, self.search_mode(), self.match_case_checkbox.isChecked())
+        document = current_tab.target_text_area.document()
+        with latency_profiler.measure("replace_all"):
+            text = document.toPlainText()
+            replacements, edits = plan_replacements(text, pattern, self.replacement_text())
+            if edits:
+                apply_replacements(document, edits_to_document(text, edits))
 
-        cursor.endEditBlock()
+        self.report_replace_all(text_to_find, text_to_replace, replacements)
 
+    def report_replace_all(self, text_to_find, text_to_replace, replacements):
         if replacements > 0:
             QMessageBox.information(
                 self, "Replace All", f"Replaced '{text_to_find}' with '{text_to_replace}' {replacements} times"
@@ -241,29 +3489,150 @@ class FindReplaceDialog(QDialog):
         else:
             QMessageBox.information(self, "Replace All", f"Not found: '{text_to_find}'")
 
+    def prepare_regex_worker(self, checked):
+        if checked:
+            self.regex_worker.ensure_process()
+
+    def start_regex_job(self, operation, args, handler):
+        current_tab = self.parent.tabs.currentWidget()
+        try:
+            pattern = compile_search_pattern(self.find_edit.text(), "regex", self.match_case_checkbox.isChecked())
+        except re.error as error:
+            QMessageBox.warning(self, "Find", f"Invalid regular expression: {error}")
+            return
+        document = current_tab.target_text_area.document()
+        self.regex_request = (current_tab, document.revision(), handler)
+        self.regex_started = ("regex_" + operation, time.perf_counter())
+        self.regex_worker.timeout_ms = self.timeout_spin.value() * 1000
+        self.regex_worker.start_job(
+            (id(document), document.revision()), document.toPlainText, operation, pattern, args
+        )
+        self.search_status.setText("กำลังค้นหา...")
+        self.cancel_search_button.show()
+
+    def finish_regex_job(self, status=""):
+        self.regex_request = None
+        self.search_status.setText(status)
+        self.cancel_search_button.hide()
+
+    def regex_request_stale(self):
+        tab, revision, handler = self.regex_request
+        return self.parent.tabs.indexOf(tab) == -1 or tab.target_text_area.document().revision() != revision
+
+    def on_regex_progress(self, matches, elapsed_ms):
+        if self.regex_request is None:
+            return
+        if self.regex_request_stale():
+            self.regex_worker.cancel()
+            self.finish_regex_job("เอกสารถูกแก้ไขระหว่างค้นหา กรุณาลองอีกครั้ง")
+            return
+        self.search_status.setText(f"กำลังค้นหา... พบ {matches:,} รายการ ({elapsed_ms / 1000:.1f} วินาที)")
+
+    def on_regex_finished(self, result):
+        if self.regex_request is None:
+            return
+        tab, revision, handler = self.regex_request
+        if self.regex_request_stale():
+            self.finish_regex_job("เอกสารถูกแก้ไขระหว่างค้นหา กรุณาลองอีกครั้ง")
+            return
+        self.finish_regex_job()
+        latency_profiler.record(*self.regex_started)
+        handler(tab, result)
+
+    def on_regex_failed(self, message):
+        self.finish_regex_job(f"ค้นหาไม่สำเร็จ: {message}")
+
+    def on_regex_timed_out(self):
+        self.finish_regex_job(f"หมดเวลาค้นหา ({self.timeout_spin.value()} วินาที)")
+
+    def cancel_regex_search(self):
+        self.regex_worker.cancel()
+        self.finish_regex_job("ยกเลิกการค้นหาแล้ว")
+
+    def select_match(self, tab, span):
+        cursor = tab.target_text_area.textCursor()
+        cursor.setPosition(span[0])
+        cursor.setPosition(span[1], QTextCursor.KeepAnchor)
+        tab.target_text_area.setTextCursor(cursor)
+        self.update_match_label()
+
+    def on_regex_find(self, tab, span):
+        if span is None:
+            QMessageBox.information(self, "Find", f"ไม่พบข้อความ '{self.find_edit.text()}'")
+        else:
+            self.select_match(tab, span)
+
+    def on_regex_replace(self, tab, start, end, result):
+        expansion, found = result
+        if expansion is not None:
+            cursor = tab.target_text_area.textCursor()
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursor.insertText(expansion)
+            if found and found[0] >= end:
+                delta = document_length(expansion) - (end - start)
+                found = (found[0] + delta, found[1] + delta)
+            elif found and found[1] > start:
+                found = None
+        if found:
+            self.select_match(tab, found)
+
+    def on_regex_replace_all(self, tab, text_to_find, text_to_replace, result):
+        replacements, edits = result
+        if edits:
+            with latency_profiler.measure("apply_replacements"):
+                apply_replacements(tab.target_text_area.document(), edits)
+        self.report_replace_all(text_to_find, text_to_replace, replacements)
+
 class TextComparisonTab(QWidget):
+    journal_record = Signal(object)
+    segment_finished = Signal(str, str, str)
+    current_line_changed = Signal(object)
+    files_loaded = Signal(object)
+    loading_finished = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.tab_id = uuid.uuid4().hex
+        self.restoring = False
+        self.target_length = 0
+        self.file1_path = None
+        self.file1_encoding = None
         self.file2_path = None
         self.file2_encoding = None 
+        self.file2_newline = "\n"
         self.action_connections = []
+        self.loaders = {}
+        self.load_callbacks = []
+        self.digest_tasks = []
+        self.deferred = None
+        self.last_active = 0.0
+        self.cursor_anchor = None
+        self.cursor_revision = None
 
         self.font_size_combo = QComboBox()
         self.font_size_combo.addItems([str(size) for size in range(10, 31)])
         self.font_size_combo.setCurrentText("10")
         self.font_size_combo.currentTextChanged.connect(self.update_font_size)
 
-        self.source_text_area = QTextEdit()
+        self.source_text_area = PlainTextEditor()
         self.source_text_area.setReadOnly(True)
-        self.source_text_area.setLineWrapMode(QTextEdit.NoWrap)
-        self.target_text_area = QTextEdit()
-        self.target_text_area.setLineWrapMode(QTextEdit.NoWrap)
+        self.target_text_area = PlainTextEditor()
 
         self.source_text_area.setUndoRedoEnabled(True)
         self.target_text_area.setUndoRedoEnabled(True)
 
-        self.source_text_area.verticalScrollBar().valueChanged.connect(self.target_text_area.verticalScrollBar().setValue)
-        self.target_text_area.verticalScrollBar().valueChanged.connect(self.source_text_area.verticalScrollBar().setValue)
+        self.source_view = MappedSourceView()
+        self.source_stack = QStackedWidget()
+        self.source_stack.addWidget(self.source_text_area)
+        self.source_stack.addWidget(self.source_view)
+
+        self.source_hashes = LineHashes(self.source_text_area.document(), self)
+        self.source_placeholders = LineHashes(self.source_text_area.document(), self, placeholder_key)
+        self.scroll_syncing = False
+        self.source_text_area.verticalScrollBar().valueChanged.connect(self.on_source_scrolled)
+        self.source_view.verticalScrollBar().valueChanged.connect(self.on_source_scrolled)
+        self.target_text_area.verticalScrollBar().valueChanged.connect(self.on_target_scrolled)
 
         self.open_source_button = QPushButton("เปิดไฟล์ต้นฉบับ")
         self.open_source_button.clicked.connect(self.open_source_file)
@@ -274,6 +3643,21 @@ class TextComparisonTab(QWidget):
         self.compare_button = QPushButton("ตรวจสอบสถานะการแปล")
         self.compare_button.clicked.connect(self.calculate_thai_percentage)
 
+        self.progress = TranslationProgress(self.target_text_area.document(), self)
+        self.source_hashes.lines_changed.connect(self.on_source_lines_changed)
+        self.source_view.hashes_built.connect(self.progress.align)
+        self.placeholders = PlaceholderChecker(self.target_text_area.document(), self)
+        self.source_placeholders.lines_changed.connect(self.on_source_placeholders_changed)
+        self.source_view.placeholders_built.connect(self.placeholders.align)
+        self.untranslated_strip = LineMarkStrip(
+            self, self.progress, LINE_UNTRANSLATED, UNTRANSLATED_MARK_COLOR,
+            "ตำแหน่งบรรทัดที่ยังไม่แปล (คลิกเพื่อไปยังบรรทัดนั้น)", self.progress.next_untranslated,
+        )
+        self.placeholder_strip = LineMarkStrip(
+            self, self.placeholders, PLACEHOLDER_MISMATCH, PLACEHOLDER_MARK_COLOR,
+            "ตำแหน่งบรรทัดที่ตัวแปรหรือแท็กไม่ตรงกับต้นฉบับ (คลิกเพื่อไปยังบรรทัดนั้น)", self.placeholders.next_problem,
+        )
+
         layout = QVBoxLayout()
         font_layout = QHBoxLayout()
         font_layout.addWidget(QLabel("ขนาดตัวอักษร:"))
@@ -281,32 +3665,48 @@ class TextComparisonTab(QWidget):
         layout.addLayout(font_layout)
 
         text_layout = QHBoxLayout()
-        text_layout.addWidget(self.source_text_area)
+        text_layout.addWidget(self.source_stack)
         text_layout.addWidget(self.target_text_area)
+        text_layout.addWidget(self.placeholder_strip)
+        text_layout.addWidget(self.untranslated_strip)
         layout.addLayout(text_layout)
 
+        self.load_label = QLabel()
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_cancel_button = QPushButton("ยกเลิกการโหลด")
+        self.load_cancel_button.clicked.connect(self.cancel_loading)
+        load_layout = QHBoxLayout()
+        load_layout.addWidget(self.load_label)
+        load_layout.addWidget(self.load_progress)
+        load_layout.addWidget(self.load_cancel_button)
+        self.load_bar = QWidget()
+        self.load_bar.setLayout(load_layout)
+        self.load_bar.hide()
+        layout.addWidget(self.load_bar)
 
 
 
         self.setLayout(layout)
 
 
-        self.target_text_area.textChanged.connect(self.auto_save) 
+        self.match_highlighter = MatchHighlighter(self.target_text_area, self)
+        self.auto_saver = AutoSaver(self)
+        self.auto_saver.failed.connect(self.on_auto_save_failed)
+        self.target_text_area.textChanged.connect(self.auto_save)
+        self.target_text_area.document().contentsChange.connect(self.on_target_change)
+        self.target_text_area.cursorPositionChanged.connect(self.on_target_cursor_moved)
 
     def detect_and_open_file(self, text_area):
         filepath, _ = QFileDialog.getOpenFileName(
             self, "Select a File", ".", "Text files (*.txt);;All files (*.*)"
         )
         if filepath:
-            with open(filepath, 'rb') as f:
-                rawdata = f.read()
-                result = chardet.detect(rawdata)
-                encoding = result['encoding']
+            encoding = detect_encoding(filepath)
 
             try:
-                with open(filepath, "r", encoding=encoding) as file:
-                    text_area.setPlainText(file.read())
-            except UnicodeError:
+                text_area.setPlainText(read_text_file(filepath, encoding))
+            except (UnicodeError, LookupError):
                 QMessageBox.warning(
                     self,
                     "Encoding Error",
@@ -323,8 +3723,7 @@ class TextComparisonTab(QWidget):
                 )
                 if ok and encoding:
                     try:
-                        with open(filepath, "r", encoding=encoding) as file:
-                            text_area.setPlainText(file.read())
+                        text_area.setPlainText(read_text_file(filepath, encoding))
                     except UnicodeError:
                         QMessageBox.critical(
                             self,
@@ -336,30 +3735,259 @@ class TextComparisonTab(QWidget):
             if text_area == self.target_text_area:
                 self.file2_path = filepath
                 self.file2_encoding = encoding
+                self.file2_newline = detect_newline(filepath, encoding)
+            else:
+                self.show_source_editor()
+                self.file1_path = filepath
+                self.file1_encoding = encoding
 
     def update_font_size(self):
         font = QFont()
         font.setPointSize(int(self.font_size_combo.currentText()))
         self.source_text_area.setFont(font)
+        self.source_view.setFont(font)
         self.target_text_area.setFont(font)
 
     def open_source_file(self):
         file1_path, _ = QFileDialog.getOpenFileName(self, "เปิดไฟล์ต้นฉบับ", "", 
                                                    "Text Files (*.txt);;All Files (*)")
         if file1_path:
-            with open(file1_path, "rb") as file1:
-                raw_data = file1.read()
-                result = chardet.detect(raw_data)
-                encoding = result['encoding']
+            self.open_source_path(file1_path, detect_encoding(file1_path))
+
+    def open_source_path(self, file1_path, encoding):
+        self.file1_path = file1_path
+        self.file1_encoding = encoding
+        self.record_entry(file1=self.reference(file1_path), file1_encoding=encoding, source_text=None)
+        if os.path.getsize(file1_path) >= LARGE_SOURCE_THRESHOLD:
+            previous = self.loaders.get(self.source_text_area)
+            if previous:
+                previous.cancel()
+                self.finish_loading(self.source_text_area)
+            self.source_text_area.clear()
+            self.source_view.open_file(file1_path, encoding)
+            self.source_stack.setCurrentWidget(self.source_view)
+            self.hash_file(file1_path)
+            self.notify_files_loaded()
+        else:
+            self.show_source_editor()
+            self.load_file_into(self.source_text_area, file1_path, encoding)
+
+    def source_scroller(self):
+        return self.source_view if self.source_view.is_open() else self.source_text_area
+
+    def on_source_scrolled(self):
+        if not self.scroll_syncing:
+            self.scroll_syncing = True
+            self.target_text_area.scroll_to_line(self.source_scroller().top_line())
+            self.scroll_syncing = False
+
+    def on_target_scrolled(self):
+        if not self.scroll_syncing:
+            self.scroll_syncing = True
+            self.source_scroller().scroll_to_line(self.target_text_area.top_line())
+            self.scroll_syncing = False
+
+    def show_source_editor(self):
+        was_open = self.source_view.is_open()
+        self.source_view.close_file()
+        self.source_stack.setCurrentWidget(self.source_text_area)
+        if was_open:
+            self.progress.align(self.source_hashes.hashes)
+            self.placeholders.align(self.source_placeholders.hashes)
+
+    def source_line(self, block_number):
+        if self.source_view.is_open():
+            if block_number < self.source_view.line_count():
+                return self.source_view.line_text(block_number, SOURCE_VIEW_MAX_LINE_BYTES)
+            return ""
+        block = self.source_text_area.document().findBlockByNumber(block_number)
+        return block.text() if block.isValid() else ""
+
+    def memory_query(self):
+        block = self.target_text_area.textCursor().block()
+        return self.source_line(block.blockNumber()).strip() or block.text()
+
+    def on_target_cursor_moved(self):
+        block = self.target_text_area.textCursor().block()
+        previous = self.cursor_anchor.block() if self.cursor_anchor is not None else None
+        if block == previous:
+            return
+        revision = self.cursor_revision
+        self.cursor_anchor, self.cursor_revision = QTextCursor(block), block.revision()
+        if previous is not None and previous.revision() != revision:
+            self.segment_finished.emit(
+                self.source_line(previous.blockNumber()), previous.text(), os.path.basename(self.file2_path or "")
+            )
+        self.current_line_changed.emit(self)
+
+    def memory_entry(self):
+        return {
+            "file2_path": self.file2_path,
+            "encoding": self.file2_encoding,
+            "file1_encoding": self.file1_encoding,
+            "file1": self.reference(self.file1_path),
+            "file2": self.reference(self.file2_path),
+        }
+
+    def notify_files_loaded(self):
+        if not self.loaders and self.file1_path and self.file2_path:
+            self.files_loaded.emit(self)
+
+    def on_source_lines_changed(self, first):
+        if not self.source_view.is_open():
+            self.progress.align(self.source_hashes.hashes, first)
+
+    def on_source_placeholders_changed(self, first):
+        if not self.source_view.is_open():
+            self.placeholders.align(self.source_placeholders.hashes, first)
+
+    def placeholder_problems(self, limit=PLACEHOLDER_PROBLEMS_SHOWN):
+        problems = []
+        document = self.target_text_area.document()
+        for block_number in islice(self.placeholders.problem_blocks(), limit):
+            source, target = self.source_line(block_number), document.findBlockByNumber(block_number).text()
+            missing, extra = placeholder_difference(source, target)
+            problems.append((block_number, missing, extra, source, target))
+        return problems
+
+    def source_text(self):
+        if self.source_view.is_open():
+            return self.source_view.toPlainText()
+        return self.source_text_area.toPlainText()
+
+    def search_snapshots(self):
+        if self.deferred is not None:
+            return [((self, "source"), self.deferred_text("source")), ((self, "target"), self.deferred_text("target"))]
+        if self.source_view.is_open():
+            source = self.source_view.toPlainText
+        else:
+            source = self.source_text_area.toPlainText()
+        return [((self, "source"), source), ((self, "target"), self.target_text_area.toPlainText())]
+
+    def load_file_into(self, text_area, filepath, encoding):
+        previous = self.loaders.pop(text_area, None)
+        if previous:
+            previous.cancel()
+
+        if text_area == self.target_text_area:
+            self.file2_newline = detect_newline(filepath, encoding)
+        loader = FileLoader(text_area.document(), filepath, encoding, self)
+        loader.progress.connect(self.update_load_progress)
+        loader.finished.connect(lambda: self.on_load_finished(text_area))
+        loader.failed.connect(lambda error: self.on_load_failed(text_area, error))
+        self.loaders[text_area] = loader
+        self.load_label.setText(f"กำลังโหลด {os.path.basename(filepath)}")
+        self.load_progress.setValue(0)
+        self.load_bar.show()
+        loader.start()
+
+    def set_selection_layer(self, name, selections):
+        self.target_text_area.set_selection_layer(name, selections)
+
+    def is_loading(self, text_area):
+        return text_area in self.loaders
+
+    def update_load_progress(self):
+        if self.loaders:
+            self.load_progress.setValue(min(loader.percent for loader in self.loaders.values()))
+
+    def finish_loading(self, text_area):
+        loader = self.loaders.pop(text_area, None)
+        if loader:
+            loader.deleteLater()
+        if text_area == self.target_text_area:
+            if loader and loader.edited:
+                self.record_target(text_area.toPlainText())
+                self.auto_save()
+            else:
+                text_area.document().setModified(False)
+                self.auto_saver.mark_saved()
+                self.record_target()
+        if not self.loaders:
+            self.load_bar.hide()
+            callbacks, self.load_callbacks = self.load_callbacks, []
+            for callback in callbacks:
+                callback()
+            self.loading_finished.emit()
+
+    def when_loaded(self, callback):
+        if self.loaders:
+            self.load_callbacks.append(callback)
+        else:
+            callback()
+
+    def reset_text_area(self, text_area):
+        text_area.clear()
+        if text_area == self.target_text_area:
+            self.file2_path = None
+            self.set_tab_name(None)
+            self.record_entry(file2_path=None, file2=None, target_text="")
+        else:
+            self.file1_path = None
+            self.record_entry(file1=None, source_text="")
+
+    def reference(self, filepath):
+        try:
+            return file_reference(filepath)
+        except OSError:
+            return None
 
-                if encoding.startswith('UTF-16'):
-                    if raw_data.startswith(b'\xFF\xFE'):
-                        encoding = 'UTF-16-LE'
-                    elif raw_data.startswith(b'\xFE\xFF'):
-                        encoding = 'UTF-16-BE'
+    def record_entry(self, **fields):
+        if not self.restoring:
+            self.journal_record.emit(["tab", self.tab_id, fields])
 
-            with open(file1_path, "r", encoding=encoding) as file1:
-                self.source_text_area.setPlainText(file1.read())
+    def record_target(self, text=None):
+        if self.file2_path:
+            self.record_entry(
+                file2_path=self.file2_path, encoding=self.file2_encoding, newline=self.file2_newline,
+                file2=self.reference(self.file2_path) if text is None else None, target_text=text,
+            )
+
+    def on_target_change(self, position, chars_removed, chars_added):
+        document = self.target_text_area.document()
+        old_length, self.target_length = self.target_length, document.characterCount() - 1
+        if self.restoring or self.is_loading(self.target_text_area):
+            return
+        added = max(0, min(chars_added, self.target_length - position))
+        removed = max(0, min(chars_removed - (chars_added - added), old_length - position))
+        text = ""
+        if added:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            text = cursor.selectedText().replace("\u2029", "\n")
+        self.journal_record.emit(["edit", self.tab_id, position, removed, text])
+
+    def on_load_finished(self, text_area):
+        self.hash_file(self.file2_path if text_area == self.target_text_area else self.file1_path)
+        self.finish_loading(text_area)
+        self.notify_files_loaded()
+
+    def hash_file(self, filepath):
+        if not filepath:
+            return
+        task = BackgroundTask(file_digest, filepath)
+        task.signals.finished.connect(lambda digest: self.digest_tasks.remove(task))
+        task.signals.failed.connect(lambda error: self.digest_tasks.remove(task))
+        task.setAutoDelete(False)
+        self.digest_tasks.append(task)
+        QThreadPool.globalInstance().start(task)
+
+    def on_load_failed(self, text_area, error):
+        self.finish_loading(text_area)
+        self.reset_text_area(text_area)
+        QMessageBox.critical(self, "Encoding Error", f"Failed to open file: {error}")
+
+    def stop_loading(self):
+        for text_area, loader in list(self.loaders.items()):
+            loader.cancel()
+            self.finish_loading(text_area)
+
+    def cancel_loading(self):
+        text_areas = list(self.loaders)
+        self.stop_loading()
+        for text_area in text_areas:
+            self.reset_text_area(text_area)
 
     def set_tab_name(self, file2_path):
         if file2_path:
@@ -371,30 +3999,27 @@ class TextComparisonTab(QWidget):
     def open_target_file(self):
         self.file2_path, _ = QFileDialog.getOpenFileName(self, "เปิดไฟล์ที่ต้องการแปล", "", "Text Files (*.txt);;All Files (*)")
         if self.file2_path:
-            with open(self.file2_path, "rb") as file2:
-                raw_data = file2.read()
-                result = chardet.detect(raw_data)
-                encoding = result['encoding']
-
-                if encoding.startswith('UTF-16'):
-                    if raw_data.startswith(b'\xFF\xFE'):
-                        encoding = 'UTF-16-LE'
-                    elif raw_data.startswith(b'\xFE\xFF'):
-                        encoding = 'UTF-16-BE'
-                else:
-                    encoding = 'UTF-8'
+            encoding = detect_encoding(self.file2_path)
 
             self.file2_encoding = encoding
-            with open(self.file2_path, "r", encoding=encoding) as file2:
-                self.target_text_area.setPlainText(file2.read())
+            self.load_file_into(self.target_text_area, self.file2_path, encoding)
             self.set_tab_name(self.file2_path)
 
     def save_file(self):
-        bom = b'\xFF\xFE' if self.file2_encoding == 'UTF-16-LE' else b'\xFE\xFF' if self.file2_encoding == 'UTF-16-BE' else None
-        with open(self.file2_path, "wb") as file2:
-            if bom:
-                file2.write(bom)
-            file2.write(self.target_text_area.toPlainText().encode(self.file2_encoding))
+        if self.is_loading(self.target_text_area):
+            QMessageBox.information(self, "บันทึกไฟล์", "กรุณารอให้โหลดไฟล์เสร็จก่อนบันทึก")
+            return
+        try:
+            with latency_profiler.measure("save_file", os.path.basename(self.file2_path)):
+                write_document_atomic(
+                    self.file2_path, self.target_text_area.document(), self.file2_encoding, self.file2_newline
+                )
+        except (OSError, UnicodeError, LookupError) as error:
+            QMessageBox.critical(self, "Error saving file", f"Could not save file: {error}")
+            return
+        self.target_text_area.document().setModified(False)
+        self.record_target()
+        self.hash_file(self.file2_path)
 
     def save_file_as(self):
         file2_path, _ = QFileDialog.getSaveFileName(
@@ -407,60 +4032,27 @@ class TextComparisonTab(QWidget):
             self.set_tab_name(self.file2_path)
 
     def auto_save(self):
-        if not self.file2_path:
-            return
+        self.auto_saver.schedule()
 
-        backup_folder = "Backup"
-        os.makedirs(backup_folder, exist_ok=True)
-        backup_filename = os.path.join(
-            backup_folder, os.path.basename(self.file2_path)
-        )
-
-        encoding = self.file2_encoding if self.file2_encoding else self.encoding_combo.currentText()
-
-        bom = b'\xFF\xFE' if encoding == 'UTF-16-LE' else b'\xFE\xFF' if encoding == 'UTF-16-BE' else None
-
-        new_content = self.target_text_area.toPlainText()
-        if os.path.exists(backup_filename):
-            os.remove(backup_filename)
-
-        try:
-            with open(backup_filename, "wb") as backup_file:
-                if bom:
-                    backup_file.write(bom)
-                backup_file.write(new_content.encode(encoding))
-        except UnicodeEncodeError:
+    def on_auto_save_failed(self, error):
+        encoding = self.file2_encoding or "UTF-8"
+        if isinstance(error, UnicodeEncodeError):
             QMessageBox.critical(
                 self,
                 "Error saving backup file",
                 f"Could not save backup due to encoding issues.\n"
                 f"Please make sure your text is compatible with {encoding} encoding."
             )
+        else:
+            QMessageBox.critical(self, "Error saving backup file", f"Could not save backup: {error}")
 
     def calculate_thai_percentage(self):
-        editable_text = self.target_text_area.toPlainText()
-
-        editable_text = editable_text.replace("\r\n", "\n")
-        editable_lines = editable_text.splitlines()
-        if not editable_lines:
+        self.progress.finish_pending()
+        total_line_count, thai_line_count, non_thai_line_count, thai_percentage = self.progress.summary()
+        if not total_line_count:
             QMessageBox.information(self, "Translation Progress", "No text to analyze.")
             return
 
-        thai_line_count = 0
-        non_thai_line_count = 0
-        total_line_count = len(editable_lines)
-
-        for line in editable_lines:
-            line = line.strip()
-            if line:
-                words = word_tokenize(line, engine='newmm')
-                if any(any(ord(char) >= 3585 and ord(char) <= 3675 for char in word) for word in words):
-                    thai_line_count += 1
-                else:
-                    non_thai_line_count += 1
-
-        thai_percentage = (thai_line_count / total_line_count) * 100 if total_line_count > 0 else 0
-
         QMessageBox.information(
             self,
             "สถานะการแปล",
@@ -470,21 +4062,206 @@ class TextComparisonTab(QWidget):
             f"ภาพรวม: {thai_percentage:.2f}%"
         )
 
-    def to_dict(self):
-        return {
-            "source_text": self.source_text_area.toPlainText(),
-            "target_text": self.target_text_area.toPlainText(),
+    def next_untranslated(self):
+        self.goto_untranslated(True)
+
+    def previous_untranslated(self):
+        self.goto_untranslated(False)
+
+    def goto_untranslated(self, forward):
+        if self.progress.is_pending():
+            self.progress.finish_pending()
+            self.progress.changed.emit()
+        current = self.target_text_area.textCursor().blockNumber()
+        block_number = self.progress.next_untranslated(current, forward)
+        if block_number is None:
+            TextComparisonApp.instance.statusBar().showMessage("ไม่มีบรรทัดที่ยังไม่แปล", 3000)
+            return
+        self.goto_block(block_number)
+
+    def goto_block(self, block_number):
+        block = self.target_text_area.document().findBlockByNumber(block_number)
+        if not block.isValid():
+            return
+        self.target_text_area.setTextCursor(QTextCursor(block))
+        self.target_text_area.ensureCursorVisible()
+        self.target_text_area.setFocus()
+
+    def defer(self, entry):
+        self.tab_id = entry.setdefault("id", self.tab_id)
+        self.deferred = entry
+        self.file2_path = entry.get("file2_path")
+        self.file2_encoding = entry.get("encoding") or "UTF-8"
+        self.file2_newline = entry.get("newline") or "\n"
+
+    def materialize(self):
+        if self.deferred is None:
+            return []
+        entry, self.deferred = self.deferred, None
+        self.restoring = True
+        try:
+            return self.from_project_entry(entry)
+        finally:
+            self.restoring = False
+
+    def deferred_text(self, pane):
+        if pane == "source":
+            reference, encoding, text = self.deferred.get("file1"), self.deferred.get("file1_encoding"), "source_text"
+        else:
+            reference, encoding, text = self.deferred.get("file2"), self.deferred.get("encoding"), "target_text"
+        if reference is None:
+            return self.deferred.get(text, "")
+        return lambda: read_reference(reference, encoding)
+
+    def memory_chars(self):
+        return (
+            self.source_text_area.document().characterCount()
+            + self.target_text_area.document().characterCount()
+        )
+
+    def unload(self):
+        if self.deferred is not None or self.loaders or self.target_text_area.document().isModified():
+            return False
+        entry = self.project_entry()
+        if entry["file1"] is None or entry["file2"] is None:
+            return False
+        self.restoring = True
+        self.show_source_editor()
+        self.source_text_area.clear()
+        self.target_text_area.clear()
+        self.restoring = False
+        self.target_text_area.document().setModified(False)
+        self.auto_saver.mark_saved()
+        self.deferred = entry
+        return True
+
+    def project_entry(self):
+        if self.deferred is not None:
+            return self.deferred
+        entry = {
+            "id": self.tab_id,
             "file2_path": self.file2_path,
             "font_size": self.font_size_combo.currentText(),
             "encoding": self.file2_encoding,
+            "newline": self.file2_newline,
+            "file1_encoding": self.file1_encoding,
         }
+        try:
+            entry["file1"] = file_reference(self.file1_path) if self.file1_path else None
+        except OSError:
+            entry["file1"] = None
+        if entry["file1"] is None:
+            entry["source_text"] = self.source_text()
+
+        document = self.target_text_area.document()
+        dirty = document.isModified() and not self.is_loading(self.target_text_area)
+        try:
+            entry["file2"] = file_reference(self.file2_path) if self.file2_path and not dirty else None
+        except OSError:
+            entry["file2"] = None
+        if entry["file2"] is None:
+            entry["target_text"] = self.target_text_area.toPlainText()
+        return entry
+
+    def from_project_entry(self, entry):
+        problems = []
+        self.font_size_combo.setCurrentText(entry.get("font_size") or "10")
+        self.file2_path = entry.get("file2_path")
+        self.file2_encoding = entry.get("encoding") or "UTF-8"
+        self.file2_newline = entry.get("newline") or "\n"
+
+        source = entry.get("file1")
+        if source is None:
+            self.show_source_editor()
+            self.source_text_area.setPlainText(entry.get("source_text", ""))
+        elif os.path.exists(source["path"]):
+            if reference_matches(source) and entry.get("file1_encoding"):
+                encoding = entry["file1_encoding"]
+            else:
+                problems.append(f"ไฟล์ถูกแก้ไขหลังบันทึกโปรเจกต์: {source['path']}")
+                encoding = detect_encoding(source["path"])
+            self.open_source_path(source["path"], encoding)
+        else:
+            problems.append(f"ไม่พบไฟล์: {source['path']}")
+
+        target = entry.get("file2")
+        if target is None:
+            self.target_text_area.setPlainText(entry.get("target_text", ""))
+            self.target_text_area.document().setModified(True)
+        elif os.path.exists(target["path"]):
+            if not reference_matches(target):
+                problems.append(f"ไฟล์ถูกแก้ไขหลังบันทึกโปรเจกต์: {target['path']}")
+                self.file2_encoding = detect_encoding(target["path"])
+            self.load_file_into(self.target_text_area, target["path"], self.file2_encoding)
+        else:
+            problems.append(f"ไม่พบไฟล์: {target['path']}")
+            self.file2_path = None
+        return problems
+
+def warm_up_modules(names):
+    for name in names:
+        importlib.import_module(name)
+    return names
+
+
+class StartupProfiler(QObject):
+    def __init__(self, report=False, parent=None):
+        super().__init__(parent)
+        self.report = report
+        self.marks = [("imports", time.perf_counter())]
+        self.window = None
+        self.text_area = None
+
+    def mark(self, name):
+        if name not in dict(self.marks):
+            self.marks.append((name, time.perf_counter()))
+
+    def watch(self, window):
+        self.mark("window built")
+        self.window = window
+        self.text_area = window.tabs.currentWidget().target_text_area
+        window.installEventFilter(self)
+        self.text_area.viewport().installEventFilter(self)
+        if self.report:
+            self.text_area.document().contentsChange.connect(self.on_first_edit)
+            window.warm_up_task.signals.finished.connect(self.on_warm_up_finished)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            if watched is self.window:
+                self.mark("first window paint")
+                watched.removeEventFilter(self)
+            elif self.text_area is not None and watched is self.text_area.viewport():
+                self.mark("first editor paint")
+                watched.removeEventFilter(self)
+                if self.report:
+                    self.text_area.setFocus()
+                    QApplication.postEvent(self.text_area, QKeyEvent(QEvent.KeyPress, Qt.Key_A, Qt.NoModifier, "a"))
+        return False
+
+    def on_first_edit(self):
+        self.text_area.document().contentsChange.disconnect(self.on_first_edit)
+        self.mark("first edit")
+        self.text_area.undo()
+        self.finish()
+
+    def on_warm_up_finished(self, names):
+        self.mark("background warm-up")
+        self.finish()
+
+    def finish(self):
+        names = dict(self.marks)
+        if "first edit" not in names or "background warm-up" not in names:
+            return
+        lines = [f"startup profile (budget {STARTUP_BUDGET_MS} ms)"]
+        for name, stamp in self.marks:
+            lines.append(f"  {name:<22}{(stamp - STARTUP_STARTED) * 1000:9.1f} ms")
+        first_edit = (names["first edit"] - STARTUP_STARTED) * 1000
+        status = "within budget" if first_edit <= STARTUP_BUDGET_MS else "OVER BUDGET"
+        lines.append(f"  time to first edit {first_edit:.1f} ms: {status}")
+        print("\n".join(lines), file=sys.stderr)
+        QApplication.quit()
 
-    def from_dict(self, data):
-        self.source_text_area.setPlainText(data["source_text"])
-        self.target_text_area.setPlainText(data["target_text"])
-        self.file2_path = data["file2_path"]
-        self.font_size_combo.setCurrentText(data["font_size"])
-        self.file2_encoding = data.get("encoding", "UTF-8")
 
 class TextComparisonApp(QMainWindow):
     def __init__(self):
@@ -531,12 +4308,22 @@ class TextComparisonApp(QMainWindow):
         self.save_action = QAction(QIcon.fromTheme("document-save"), "บันทึก", self)
         self.save_as_action = QAction(QIcon.fromTheme("document-save-as"), "บันทึกเป็น...", self)
         self.compare_action = QAction(QIcon.fromTheme("view-statistics"), "ตรวจสอบสถานะการแปล", self)
+        self.previous_untranslated_action = QAction(QIcon.fromTheme("go-up"), "บรรทัดที่ยังไม่แปลก่อนหน้า", self)
+        self.previous_untranslated_action.setShortcut("Shift+F8")
+        self.next_untranslated_action = QAction(QIcon.fromTheme("go-down"), "บรรทัดที่ยังไม่แปลถัดไป", self)
+        self.next_untranslated_action.setShortcut("F8")
 
         toolbar.addAction(self.open_source_action)
         toolbar.addAction(self.open_target_action)
         toolbar.addAction(self.save_action)
         toolbar.addAction(self.save_as_action)
         toolbar.addAction(self.compare_action)
+        toolbar.addAction(self.previous_untranslated_action)
+        toolbar.addAction(self.next_untranslated_action)
+
+        restore_backup_action = QAction("กู้คืนจากไฟล์สำรอง...", self)
+        restore_backup_action.triggered.connect(self.open_backup_browser)
+        file_menu.addAction(restore_backup_action)
 
         save_project_action = QAction(QIcon.fromTheme("document-save"), "บันทึกเป็นโปรเจกต์", self)
         save_project_action.triggered.connect(self.save_project)
@@ -546,12 +4333,55 @@ class TextComparisonApp(QMainWindow):
         load_project_action.triggered.connect(self.load_project)
         file_menu.addAction(load_project_action)
 
+        import_memory_action = QAction("นำเข้าโปรเจกต์สู่หน่วยความจำการแปล...", self)
+        import_memory_action.triggered.connect(self.import_project_memory)
+        file_menu.addAction(import_memory_action)
+
+        self.progress_label = QLabel()
+        self.statusBar().addPermanentWidget(self.progress_label)
+
+        self.search_results_dock = SearchResultsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.search_results_dock)
+        self.search_results_dock.hide()
+        self.translation_memory = TranslationMemory(TRANSLATION_MEMORY_PATH, self)
+        self.translation_memory.harvested.connect(self.on_memory_harvested)
+        self.translation_memory.failed.connect(self.on_memory_failed)
+        self.memory_dock = TranslationMemoryDock(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.memory_dock)
+        self.memory_dock.hide()
+        memory_action = self.memory_dock.toggleViewAction()
+        memory_action.setShortcut("Ctrl+Shift+M")
+        toolbar.addAction(memory_action)
+        self.problems_dock = PlaceholderProblemsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.problems_dock)
+        self.problems_dock.hide()
+        problems_action = self.problems_dock.toggleViewAction()
+        problems_action.setShortcut("Ctrl+Shift+P")
+        toolbar.addAction(problems_action)
+        self.diagnostics_dock = DiagnosticsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.diagnostics_dock)
+        self.diagnostics_dock.hide()
+        diagnostics_action = self.diagnostics_dock.toggleViewAction()
+        diagnostics_action.setShortcut("Ctrl+Shift+D")
+        self.addAction(diagnostics_action)
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setSingleShot(True)
+        self.progress_timer.timeout.connect(self.update_progress_status)
+
         self.tabs.currentChanged.connect(self.on_tab_changed)
 
         self.current_tab = None
+        self.project_journal = None
 
         self.add_new_tab()
 
+        self.warm_up_task = BackgroundTask(warm_up_modules, WARMUP_MODULES)
+        self.warm_up_task.setAutoDelete(False)
+        QTimer.singleShot(STARTUP_WARMUP_DELAY_MS, self.warm_up)
+
+    def warm_up(self):
+        QThreadPool.globalInstance().start(self.warm_up_task)
+
     def open_source_file(self, tab):
         tab.open_source_file()
 
@@ -567,31 +4397,154 @@ class TextComparisonApp(QMainWindow):
     def calculate_thai_percentage(self, tab):
         tab.calculate_thai_percentage()
 
+    def open_backup_browser(self):
+        current_tab = self.tabs.currentWidget()
+        if current_tab is None or not current_tab.file2_path:
+            QMessageBox.information(self, "กู้คืนเวอร์ชัน", "แท็บนี้ยังไม่มีไฟล์ที่ต้องการแปล")
+            return
+        current_tab.auto_saver.flush()
+        browser = BackupBrowser(current_tab, self)
+        if not browser.version_count():
+            QMessageBox.information(self, "กู้คืนเวอร์ชัน", "ยังไม่มีไฟล์สำรองสำหรับไฟล์นี้")
+            return
+        browser.exec()
+
     def save_project(self):
         project_path, _ = QFileDialog.getSaveFileName(
             self, "บันทึกเป็นโปรเจกต์", "", "Project Files (*.project)"
         )
-        if project_path:
-            project_data = {
-                "tabs": [tab.to_dict() for tab in self.get_all_tabs()]
-            }
-            with open(project_path, "w", encoding="utf-8") as f:
-                json.dump(project_data, f, indent=4)
+        if not project_path:
+            return
+        if self.project_journal and os.path.abspath(project_path) == os.path.abspath(self.project_journal.project_path):
+            self.project_journal.flush()
+            return
+        generation = uuid.uuid4().hex
+        try:
+            with latency_profiler.measure("save_project", os.path.basename(project_path)):
+                write_project(project_path, self.project_entries(), generation)
+        except OSError as error:
+            QMessageBox.critical(self, "บันทึกเป็นโปรเจกต์", f"Could not save project: {error}")
+            return
+        self.start_journal(project_path, generation, fresh=True)
+
+    def project_entries(self):
+        return [tab.project_entry() for tab in self.get_all_tabs()]
+
+    def start_journal(self, project_path, generation, fresh):
+        if self.project_journal:
+            self.project_journal.close()
+            self.project_journal.deleteLater()
+        self.project_journal = ProjectJournal(project_path, generation, self.project_entries, self)
+        self.project_journal.failed.connect(self.on_journal_failed)
+        self.project_journal.start(fresh)
+
+    def record_journal(self, record):
+        if self.project_journal and any(tab.tab_id == record[1] for tab in self.get_all_tabs()):
+            self.project_journal.record(record)
+
+    def on_journal_failed(self, error):
+        self.statusBar().showMessage(f"บันทึกประวัติโปรเจกต์ไม่สำเร็จ: {error}", 10000)
 
     def load_project(self):
         project_path, _ = QFileDialog.getOpenFileName(
             self, "โหลดโปรเจกต์", "", "Project Files (*.project)"
         )
         if project_path:
-            with open(project_path, "r", encoding="utf-8") as f:
-                project_data = json.load(f)
-            self.tabs.clear()
+            started = time.perf_counter()
+            try:
+                project_data = read_project(project_path)
+            except (OSError, ValueError, zlib.error) as error:
+                QMessageBox.critical(self, "โหลดโปรเจกต์", f"Could not load project: {error}")
+                return
+            if project_data["version"] == 1:
+                project_data["tabs"] = [legacy_project_entry(tab_data) for tab_data in project_data["tabs"]]
+            records = read_journal(project_path + JOURNAL_SUFFIX)
+            problems = replay_journal(project_data, records)
+            if self.project_journal:
+                self.project_journal.close()
+                self.project_journal.deleteLater()
+                self.project_journal = None
+            self.tabs.blockSignals(True)
+            while self.tabs.count():
+                self.close_tab(self.tabs.count() - 1)
+            self.tabs.blockSignals(False)
             for tab_data in project_data["tabs"]:
                 new_tab = TextComparisonTab(self)
-                new_tab.from_dict(tab_data)
+                self.connect_tab(new_tab)
                 self.tabs.addTab(new_tab, "Loading...")
                 self.add_close_button(new_tab)
-                new_tab.set_tab_name(tab_data.get("file2_path"))
+                new_tab.defer(tab_data)
+                new_tab.set_tab_name(new_tab.file2_path)
+            generation = project_data.get("journal")
+            self.start_journal(project_path, generation, fresh=not records or records[0] != ["base", generation])
+            self.activate_tab(self.tabs.currentWidget())
+            latency_profiler.record("load_project", started, os.path.basename(project_path))
+            self.translation_memory.harvest(project_data["tabs"])
+            if problems:
+                QMessageBox.warning(self, "โหลดโปรเจกต์", "\n".join(problems))
+
+    def connect_tab(self, tab):
+        tab.journal_record.connect(self.record_journal)
+        tab.segment_finished.connect(self.translation_memory.remember)
+        tab.current_line_changed.connect(self.update_memory_suggestions)
+        tab.files_loaded.connect(self.harvest_tab_memory)
+        tab.loading_finished.connect(self.unload_inactive_tabs)
+
+    def disconnect_tab(self, tab):
+        connections = [
+            (tab.journal_record, self.record_journal),
+            (tab.segment_finished, self.translation_memory.remember),
+            (tab.current_line_changed, self.update_memory_suggestions),
+            (tab.files_loaded, self.harvest_tab_memory),
+            (tab.loading_finished, self.unload_inactive_tabs),
+        ]
+        for signal, slot in connections:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+
+    def harvest_tab_memory(self, tab):
+        self.translation_memory.harvest([tab.memory_entry()])
+
+    def import_project_memory(self):
+        project_path, _ = QFileDialog.getOpenFileName(
+            self, "นำเข้าโปรเจกต์สู่หน่วยความจำการแปล", "", "Project Files (*.project)"
+        )
+        if project_path:
+            self.translation_memory.import_project(project_path)
+            self.statusBar().showMessage("กำลังนำเข้าหน่วยความจำการแปล...", 5000)
+
+    def on_memory_harvested(self, added):
+        if added:
+            self.statusBar().showMessage(f"เพิ่ม {added:,} คู่ประโยคในหน่วยความจำการแปล", 5000)
+            self.update_memory_suggestions()
+
+    def on_memory_failed(self, error):
+        self.statusBar().showMessage(f"หน่วยความจำการแปลผิดพลาด: {error}", 10000)
+
+    def update_memory_suggestions(self, tab=None):
+        current_tab = self.tabs.currentWidget()
+        if not self.memory_dock.isVisible() or current_tab is None or tab not in (None, current_tab):
+            return
+        text = current_tab.memory_query()
+        started = time.perf_counter()
+        suggestions = self.translation_memory.lookup(text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        latency_profiler.record("memory_lookup", started)
+        self.memory_dock.show_suggestions(text, suggestions, elapsed_ms)
+
+    def apply_memory_suggestion(self, target):
+        tab = self.tabs.currentWidget()
+        if tab is None or target is None:
+            return
+        cursor = tab.target_text_area.textCursor()
+        cursor.movePosition(QTextCursor.StartOfBlock)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        line = cursor.selectedText()
+        cursor.insertText(line[:len(line) - len(line.lstrip())] + target)
+        tab.target_text_area.setTextCursor(cursor)
+        tab.target_text_area.setFocus()
 
     def get_all_tabs(self):
         return [
@@ -609,6 +4562,54 @@ class TextComparisonApp(QMainWindow):
                 self.connect_actions(new_tab)
 
                 self.current_tab = new_tab
+            self.activate_tab(new_tab)
+        self.update_progress_status()
+        self.update_memory_suggestions()
+        self.problems_dock.schedule_refresh()
+        dialog = getattr(self, "find_replace_dialog", None)
+        if dialog is not None and dialog.isVisible():
+            dialog.update_highlight()
+
+    def activate_tab(self, tab):
+        if tab is None:
+            return
+        tab.last_active = time.monotonic()
+        problems = tab.materialize()
+        self.unload_inactive_tabs()
+        if problems:
+            QMessageBox.warning(self, "โหลดโปรเจกต์", "\n".join(problems))
+
+    def unload_inactive_tabs(self, budget=TAB_MEMORY_BUDGET_CHARS):
+        tabs = [tab for tab in self.get_all_tabs() if tab.deferred is None]
+        total = sum(tab.memory_chars() for tab in tabs)
+        current_tab = self.tabs.currentWidget()
+        for tab in sorted(tabs, key=lambda tab: tab.last_active):
+            if total <= budget:
+                break
+            if tab is current_tab:
+                continue
+            size = tab.memory_chars()
+            if tab.unload():
+                total -= size
+
+    def schedule_progress_update(self):
+        if not self.progress_timer.isActive():
+            self.progress_timer.start(PROGRESS_REFRESH_MS)
+
+    def update_progress_status(self):
+        self.progress_timer.stop()
+        tab = self.tabs.currentWidget()
+        if tab is None:
+            self.progress_label.clear()
+            return
+        total, translated, untranslated, percentage = tab.progress.summary()
+        text = (
+            f"แปลแล้ว: {translated:,}  ยังไม่แปล: {untranslated:,}  "
+            f"ทั้งหมด: {total:,}  ({percentage:.2f}%)"
+        )
+        if tab.progress.is_pending():
+            text += "  กำลังคำนวณ..."
+        self.progress_label.setText(text)
 
     def connect_actions(self, tab):
         self.open_source_action.triggered.connect(tab.open_source_file)
@@ -616,7 +4617,10 @@ class TextComparisonApp(QMainWindow):
         self.save_action.triggered.connect(tab.save_file)
         self.save_as_action.triggered.connect(tab.save_file_as)
         self.compare_action.triggered.connect(tab.calculate_thai_percentage)
-
+        self.previous_untranslated_action.triggered.connect(tab.previous_untranslated)
+        self.next_untranslated_action.triggered.connect(tab.next_untranslated)
+        tab.progress.changed.connect(self.schedule_progress_update)
+        tab.placeholders.changed.connect(self.problems_dock.schedule_refresh)
 
     def disconnect_actions(self, tab):
         try:
@@ -639,11 +4643,29 @@ class TextComparisonApp(QMainWindow):
             self.compare_action.triggered.disconnect()
         except TypeError:
             pass
+        try:
+            self.previous_untranslated_action.triggered.disconnect()
+        except TypeError:
+            pass
+        try:
+            self.next_untranslated_action.triggered.disconnect()
+        except TypeError:
+            pass
+        try:
+            tab.progress.changed.disconnect(self.schedule_progress_update)
+        except (TypeError, RuntimeError):
+            pass
+        try:
+            tab.placeholders.changed.disconnect(self.problems_dock.schedule_refresh)
+        except (TypeError, RuntimeError):
+            pass
 
 
     def add_new_tab(self):
         new_tab = TextComparisonTab(self)
+        self.connect_tab(new_tab)
         self.tabs.addTab(new_tab, "New Tab")
+        self.record_journal(["tab", new_tab.tab_id, new_tab.project_entry()])
 
         self.tabs.setCurrentWidget(new_tab)
         self.on_tab_changed(self.tabs.indexOf(new_tab))
@@ -660,16 +4682,34 @@ class TextComparisonApp(QMainWindow):
         widget = self.tabs.widget(index)
         if widget is not None:
             self.disconnect_actions(widget)
+            widget.stop_loading()
+            widget.source_view.close_file()
+            widget.auto_saver.flush()
+            self.record_journal(["close", widget.tab_id])
+            self.disconnect_tab(widget)
             widget.deleteLater()
         self.tabs.removeTab(index)
 
         if self.tabs.count() == 0:
             self.current_tab = None
 
+    def closeEvent(self, event):
+        dialog = getattr(self, "find_replace_dialog", None)
+        if dialog is not None:
+            dialog.close()
+        for tab in self.get_all_tabs():
+            tab.stop_loading()
+            tab.auto_saver.flush()
+        if self.project_journal:
+            self.project_journal.close()
+        self.translation_memory.close()
+        QThreadPool.globalInstance().waitForDone()
+        super().closeEvent(event)
+
     def close_current_tab(self):
         current_tab_index = self.tabs.currentIndex()
         if current_tab_index != -1:
-            self.tabs.removeTab(current_tab_index)
+            self.close_tab(current_tab_index)
 
     def open_find_replace_dialog(self):
         current_tab_index = self.tabs.currentIndex()
@@ -679,8 +4719,50 @@ class TextComparisonApp(QMainWindow):
         self.find_replace_dialog = FindReplaceDialog(self)
         self.find_replace_dialog.show()
 
-    def highlight_all_matches(self, text_to_find):
-        pass
+    def highlight_all_matches(self, text_to_find, mode="normal", match_case=False, visible=True):
+        pattern = None
+        if text_to_find:
+            try:
+                pattern = compile_search_pattern(text_to_find, mode, match_case)
+            except re.error:
+                pattern = None
+        current_tab = self.tabs.currentWidget()
+        for tab in self.get_all_tabs():
+            if tab is current_tab:
+                tab.match_highlighter.set_pattern(pattern, visible, isolated=mode == "regex")
+            else:
+                tab.match_highlighter.set_pattern(None, False)
+
+    def find_in_all_tabs(self, pattern):
+        sources = []
+        for tab in self.get_all_tabs():
+            sources.extend(tab.search_snapshots())
+        self.search_results_dock.start(pattern, sources)
+
+    def show_search_result(self, tab, pane, line_number, column, length):
+        if self.tabs.indexOf(tab) == -1:
+            return
+        self.tabs.setCurrentWidget(tab)
+        tab.when_loaded(lambda: self.jump_to_result(tab, pane, line_number, column, length))
+
+    def jump_to_result(self, tab, pane, line_number, column, length):
+        if self.tabs.indexOf(tab) == -1:
+            return
+        if pane == "source" and tab.source_view.is_open():
+            tab.source_view.show_line(line_number)
+            tab.source_view.setFocus()
+            return
+        text_area = tab.source_text_area if pane == "source" else tab.target_text_area
+        block = text_area.document().findBlockByNumber(line_number)
+        if not block.isValid():
+            return
+        positions = PositionMap(block.text())
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + positions.to_document(column))
+        cursor.setPosition(block.position() + positions.to_document(column + length), QTextCursor.KeepAnchor)
+        text_area.setTextCursor(cursor)
+        text_area.ensureCursorVisible()
+        text_area.setFocus()
 
     def find_in_current_tab(self):
         current_tab = self.tabs.currentWidget()
@@ -712,7 +4794,7 @@ class TextComparisonApp(QMainWindow):
         if self.is_dark_mode:
             self.setStyleSheet("""
             QMainWindow { background-color: #121212; color: #EEEEEE; } 
-            QTextEdit { background-color: #1E1E1E; color: #EEEEEE; }
+            QTextEdit, QPlainTextEdit { background-color: #1E1E1E; color: #EEEEEE; }
             QMenuBar { background-color: #242424; color: #EEEEEE; }
             QMenu { background-color: #242424; color: #EEEEEE; }
             QPushButton { background-color: #303030; color: #EEEEEE; }
@@ -740,7 +4822,19 @@ class TextComparisonApp(QMainWindow):
             )
 
 if __name__ == "__main__":
+    if "--regex-worker" in sys.argv:
+        run_regex_worker()
+        sys.exit(0)
+    if "--batch" in sys.argv:
+        sys.exit(run_batch(sys.argv[1:]))
+
+    profiler = StartupProfiler(report="--profile-startup" in sys.argv)
+    latency_profiler.enabled = "--diagnostics" in sys.argv
     app = QApplication(sys.argv)
+    profiler.mark("application")
     window = TextComparisonApp()
+    profiler.watch(window)
     window.show()
+    if latency_profiler.enabled:
+        window.diagnostics_dock.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,278 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+EDITOR_PATH = os.path.join(os.path.dirname(BENCHMARK_FOLDER), "Text Editor.py")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_FOLDER, "baseline.json")
+SIZES_MB = (1, 10, 100)
+ENCODINGS = ("UTF-8", "UTF-16-LE")
+FIND_REPEATS = 50
+REGRESSION_THRESHOLD = 1.2
+REGRESSION_FLOOR_S = 0.005
+REGRESSION_FLOOR_MB = 10
+RUNS = 3
+TIMEOUT_S = 600
+
+THAI_WORDS = ["สวัสดี", "ภาษาไทย", "การแปล", "ข้อความ", "ตัวอย่าง", "โปรแกรม", "บรรทัด", "ทดสอบ"]
+ENGLISH_WORDS = ["hello", "translation", "sample", "editor", "line", "progress", "needle", "window"]
+
+
+def load_editor():
+    spec = importlib.util.spec_from_file_location("text_editor", EDITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["text_editor"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_file(path, size_mb, encoding):
+    rnd = random.Random(size_mb)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-16" if encoding == "UTF-16-LE" else "utf-8", newline="\n") as file:
+        while written < target:
+            words = THAI_WORDS if rnd.random() < 0.6 else ENGLISH_WORDS
+            line = " ".join(rnd.choice(words) for _ in range(rnd.randrange(3, 12))) + "\n"
+            file.write(line)
+            written += len(line.encode("utf-16-le" if encoding == "UTF-16-LE" else "utf-8"))
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class CaseRunner:
+    def __init__(self, editor, workdir, size_mb, encoding):
+        self.te = editor
+        self.workdir = workdir
+        self.size_mb = size_mb
+        self.encoding = encoding
+        self.results = {}
+        self.app = editor.QApplication.instance() or editor.QApplication([])
+        editor.QMessageBox.information = staticmethod(lambda *args, **kwargs: None)
+        editor.QMessageBox.warning = staticmethod(lambda *args, **kwargs: None)
+        editor.BACKUP_FOLDER = os.path.join(workdir, "Backup")
+        editor.TRANSLATION_MEMORY_PATH = os.path.join(workdir, "translation_memory.db")
+        self.window = editor.TextComparisonApp()
+        self.window.show()
+        self.tab = self.window.tabs.currentWidget()
+
+    def pump(self, condition, timeout=TIMEOUT_S):
+        deadline = time.perf_counter() + timeout
+        while condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("benchmark step did not finish")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def record(self, name, seconds, megabytes=None):
+        result = {"seconds": round(seconds, 4)}
+        if megabytes:
+            result["mb_per_s"] = round(megabytes / seconds, 2) if seconds > 0 else None
+        self.results[name] = result
+
+    def choose_file(self, path):
+        self.te.QFileDialog.getOpenFileName = staticmethod(lambda *args, **kwargs: (path, ""))
+        self.te.QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (path, ""))
+
+    def run(self):
+        source = os.path.join(self.workdir, f"bench-{self.size_mb}mb-{self.encoding}.txt")
+        generate_file(source, self.size_mb, self.encoding)
+        megabytes = os.path.getsize(source) / (1024 * 1024)
+
+        self.choose_file(source)
+        start = time.perf_counter()
+        self.tab.open_target_file()
+        self.pump(lambda: self.tab.is_loading(self.tab.target_text_area))
+        self.record("open_target_file", time.perf_counter() - start, megabytes)
+
+        start = time.perf_counter()
+        self.tab.calculate_thai_percentage()
+        self.record("calculate_thai_percentage", time.perf_counter() - start, megabytes)
+
+        self.window.open_find_replace_dialog()
+        dialog = self.window.find_replace_dialog
+        dialog.find_edit.setText("needle")
+        start = time.perf_counter()
+        for _ in range(FIND_REPEATS):
+            dialog.find()
+        self.record("find_latency", (time.perf_counter() - start) / FIND_REPEATS)
+
+        dialog.regex_radio.setChecked(True)
+        dialog.find_edit.setText(r"need\w+")
+        start = time.perf_counter()
+        dialog.find()
+        self.pump(lambda: dialog.regex_request is not None)
+        self.record("regex_find", time.perf_counter() - start, megabytes)
+
+        dialog.normal_radio.setChecked(True)
+        dialog.find_edit.setText("needle")
+        dialog.replace_edit.setText("pin")
+        start = time.perf_counter()
+        dialog.replace_all()
+        self.record("replace_all", time.perf_counter() - start, megabytes)
+        self.tab.target_text_area.undo()
+
+        dialog.regex_radio.setChecked(True)
+        dialog.find_edit.setText(r"need(\w+)")
+        dialog.replace_edit.setText(r"pin\1")
+        start = time.perf_counter()
+        dialog.replace_all()
+        self.pump(lambda: dialog.regex_request is not None)
+        self.record("regex_replace_all", time.perf_counter() - start, megabytes)
+        self.tab.target_text_area.undo()
+        dialog.close()
+
+        saver = self.tab.auto_saver
+        self.tab.target_text_area.textCursor().insertText("x")
+        start = time.perf_counter()
+        self.tab.auto_save()
+        saver.flush()
+        self.pump(lambda: saver.task is not None)
+        self.record("auto_save", time.perf_counter() - start, megabytes)
+
+        start = time.perf_counter()
+        self.tab.save_file()
+        self.record("save_file", time.perf_counter() - start, megabytes)
+
+        self.tab.target_text_area.textCursor().insertText("y")
+        project = os.path.join(self.workdir, "bench.project")
+        self.choose_file(project)
+        start = time.perf_counter()
+        self.window.save_project()
+        self.record("save_project", time.perf_counter() - start, megabytes)
+
+        start = time.perf_counter()
+        self.window.load_project()
+        tab = self.window.tabs.currentWidget()
+        self.pump(lambda: tab.loaders)
+        self.record("load_project", time.perf_counter() - start, megabytes)
+
+        if self.window.project_journal:
+            self.window.project_journal.close()
+        self.window.translation_memory.close()
+        self.results["peak_rss_mb"] = peak_rss_mb()
+        return self.results
+
+
+def run_case(size_mb, encoding):
+    editor = load_editor()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = CaseRunner(editor, workdir, size_mb, encoding).run()
+        editor.QThreadPool.globalInstance().waitForDone()
+    return results
+
+
+def case_name(size_mb, encoding):
+    return f"{size_mb}MB-{encoding}"
+
+
+def median_results(runs):
+    results = {}
+    for metric, value in runs[0].items():
+        if metric == "peak_rss_mb":
+            results[metric] = statistics.median_low(run[metric] for run in runs)
+        else:
+            ordered = sorted((run[metric] for run in runs), key=lambda result: result["seconds"])
+            results[metric] = ordered[(len(ordered) - 1) // 2]
+    return results
+
+
+def run_all(sizes, encodings, runs=RUNS):
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "runs": runs, "cases": {}}
+    for size_mb in sizes:
+        for encoding in encodings:
+            name = case_name(size_mb, encoding)
+            results = []
+            for run in range(runs):
+                print(f"running {name} ({run + 1}/{runs}) ...", file=sys.stderr)
+                process = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--case", str(size_mb), encoding],
+                    capture_output=True, text=True,
+                )
+                if process.returncode != 0:
+                    report["cases"][name] = {"error": process.stderr.strip().splitlines()[-1:]}
+                    break
+                results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+            else:
+                report["cases"][name] = median_results(results)
+    return report
+
+
+def compare(report, baseline):
+    lines = []
+    for name, results in report["cases"].items():
+        lines.append(name)
+        if "error" in results:
+            lines.append(f"  error: {results['error']}")
+            continue
+        previous = baseline.get("cases", {}).get(name, {})
+        for metric, value in results.items():
+            if metric == "peak_rss_mb":
+                current, old, unit, floor = value, previous.get(metric), "MB", REGRESSION_FLOOR_MB
+            else:
+                current, old = value["seconds"], previous.get(metric, {}).get("seconds")
+                unit, floor = "s", REGRESSION_FLOOR_S
+            line = f"  {metric:<28}{current:>10} {unit}"
+            if current is not None and old:
+                ratio = current / old
+                regressed = ratio > REGRESSION_THRESHOLD and current - old > floor
+                flag = "  REGRESSION" if regressed else ""
+                line += f"   baseline {old} {unit} ({ratio:.2f}x){flag}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == "--case":
+        print(json.dumps(run_case(int(argv[1]), argv[2])))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark the text editor headless.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES_MB), help="file sizes in MB")
+    parser.add_argument("--encodings", default=",".join(ENCODINGS))
+    parser.add_argument("--runs", type=int, default=RUNS, help="runs per case; the median is reported")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--output", help="also write the raw results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = run_all(sizes, args.encodings.split(","), args.runs)
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    except (OSError, ValueError):
+        baseline = {}
+    comparison = compare(report, baseline)
+    print(comparison)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        baseline.setdefault("cases", {}).update(report["cases"])
+        baseline["python"], baseline["platform"], baseline["runs"] = report["python"], report["platform"], report["runs"]
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+    return 1 if "REGRESSION" in comparison and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
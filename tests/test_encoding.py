@@ -0,0 +1,46 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+EDITOR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Text Editor.py")
+
+
+@pytest.fixture(scope="module")
+def editor():
+    spec = importlib.util.spec_from_file_location("text_editor", EDITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["text_editor"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_tis620_after_long_ascii_prefix(editor, tmp_path):
+    prefix = "".join(f"line {index} plain ascii text\n" for index in range(14000))
+    thai = "สวัสดีครับ นี่คือข้อความภาษาไทยสำหรับทดสอบการตรวจหารหัสอักขระ\n" * 200
+    path = tmp_path / "tis620.txt"
+    path.write_bytes(prefix.encode("ascii") + thai.encode("tis-620"))
+    assert len(prefix) > 340 * 1024
+
+    encoding = editor.detect_encoding(str(path))
+
+    assert encoding.upper().replace("_", "-") != "UTF-8"
+    assert editor.read_text_file(str(path), encoding) == prefix + thai
+
+
+def test_utf8_file(editor, tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_text("ascii prefix\n" * 1000 + "ภาษาไทย\n", encoding="utf-8")
+
+    assert editor.detect_encoding(str(path)) == "UTF-8"
+
+
+def test_utf8_error_offset(editor, tmp_path):
+    path = tmp_path / "broken.txt"
+    path.write_bytes("ไทย".encode("utf-8") + b"abc\xa1def")
+
+    with open(path, "rb") as file:
+        assert editor.utf8_error_offset(file) == 12